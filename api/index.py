@@ -16,11 +16,13 @@ if not project_root.exists():
 sys.path.insert(0, str(project_root))
 os.chdir(project_root)
 
-# 导入Flask应用工厂
-from app import create_app
+# Vercel 边缘代理追加一层 X-Forwarded-For，限流按其记录的客户端 IP 计数
+os.environ.setdefault('TRUSTED_PROXY_HOPS', '1')
 
-# 创建应用实例
-app = create_app('production')
+# 获取进程内唯一的应用实例（app 模块导入时不再另建实例）
+from app import get_app
+
+app = get_app('production')
 
 # Vercel 入口点
 vercel_app = app
@@ -7,7 +7,10 @@
 from flask import Flask
 from config import get_config
 from routes import register_blueprints
+from services.corpus_store import init_corpus_store
 from services.data_service import DataService
+from services.page_cache import init_page_cache
+from services.warmup import init_warmup
 from utils.security import init_security
 
 
@@ -30,12 +33,21 @@ def create_app(config_name=None):
     # 初始化安全配置
     init_security(app)
 
+    # 初始化页面缓存
+    init_page_cache(app)
+
+    # 数据文件热加载
+    init_corpus_store(app)
+
     # 注册蓝图
     register_blueprints(app)
 
     # 注册错误处理器
     register_error_handlers(app)
 
+    # 启动预热（可选）
+    init_warmup(app)
+
     return app
 
 
@@ -61,12 +73,34 @@ def register_error_handlers(app):
         return render_template('ddj/index.html', data=DataService.load_data()), 500
 
 
-# 创建应用实例
-app = create_app()
+# 进程内唯一的应用实例（首次访问时创建）
+_app = None
+
+
+def get_app(config_name=None):
+    """
+    获取进程内共享的应用实例，首次调用时创建
+
+    Args:
+        config_name: 配置名称，仅在首次创建时生效
+
+    Returns:
+        Flask 应用实例
+    """
+    global _app
+    if _app is None:
+        _app = create_app(config_name)
+    return _app
+
+
+def __getattr__(name):
+    """兼容 `from app import app`：按需创建应用实例，避免导入时重复建应用"""
+    # Vercel 部署入口 vercel_app 与 app 为同一实例
+    if name in ('app', 'vercel_app'):
+        return get_app()
+    raise AttributeError(f"module 'app' has no attribute '{name}'")
 
-# Vercel 部署入口
-vercel_app = app
 
 # 本地开发入口
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    get_app().run(debug=True, host='0.0.0.0', port=5000)
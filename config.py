@@ -11,12 +11,36 @@ BASE_DIR = Path(__file__).parent
 DATA_DIR = BASE_DIR / "data"
 DATA_FILE = DATA_DIR / "daodejing.json"
 CLASSICS_FILE = DATA_DIR / "classics.json"
+GLOSSARY_FILE = DATA_DIR / "daodejing" / "glossary.json"
 
 # Flask 配置
 class Config:
     """基础配置"""
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     JSON_AS_ASCII = False
+    # 内容响应的 Cache-Control max-age（秒），0 表示客户端每次凭 ETag 验证
+    HTTP_CACHE_MAX_AGE = int(os.environ.get('HTTP_CACHE_MAX_AGE', 0))
+    # 已渲染页面的内存缓存上限（字节），0 表示不缓存
+    PAGE_CACHE_MAX_BYTES = int(os.environ.get('PAGE_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    # 页面磁盘缓存目录（可选，多进程部署时共享渲染结果）
+    PAGE_CACHE_DIR = os.environ.get('PAGE_CACHE_DIR') or None
+    # 页面磁盘缓存上限（字节），超出后删除最久未用的页面（含旧版本）
+    PAGE_CACHE_DISK_MAX_BYTES = int(os.environ.get('PAGE_CACHE_DISK_MAX_BYTES', 256 * 1024 * 1024))
+    # 启动预热：预加载经典、建立索引并预渲染每部经典前 WARMUP_TOP_N 章
+    WARMUP = os.environ.get('WARMUP', '').lower() in ('1', 'true', 'yes')
+    WARMUP_BACKGROUND = os.environ.get('WARMUP_BACKGROUND', '1').lower() in ('1', 'true', 'yes')
+    WARMUP_TOP_N = int(os.environ.get('WARMUP_TOP_N', 10))
+    # 数据文件热加载检查间隔（秒），0 表示关闭
+    CORPUS_RELOAD_INTERVAL = float(os.environ.get('CORPUS_RELOAD_INTERVAL', 2.0))
+    # 速率限制计数存储：memory（每进程独立）或 sqlite（同机多进程共享）
+    RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+    # sqlite 存储的数据库文件，默认位于应用 instance 目录
+    RATE_LIMIT_DB = os.environ.get('RATE_LIMIT_DB') or None
+    # 限流标识：ip（客户端 IP）或 api_key（X-API-Key 请求头，未携带时按 IP）
+    RATE_LIMIT_KEY = os.environ.get('RATE_LIMIT_KEY', 'ip')
+    # 可信反向代理层数，用于从 X-Forwarded-For 取客户端 IP；默认 0 表示直连，
+    # 不采信客户端可伪造的代理头（Vercel 入口 api/index.py 设为 1）
+    TRUSTED_PROXY_HOPS = int(os.environ.get('TRUSTED_PROXY_HOPS', 0))
 
 
 class DevelopmentConfig(Config):
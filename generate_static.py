@@ -11,8 +11,8 @@ from pathlib import Path
 
 # 从服务层导入共享逻辑
 from config import DATA_DIR, BASE_DIR
-from services.annotation_service import annotate_difficult_chars
-from services.classic_service import get_all_classics, load_classics_metadata
+from services.classic_service import ClassicService, get_all_classics, load_classics_metadata
+from services.corpus_store import Corpus
 
 # 静态生成器专用配置
 OUTPUT_DIR = BASE_DIR / 'dist'
@@ -725,8 +725,9 @@ def generate_all_chapters_page(data, classic_meta):
     return html
 
 
-def generate_chapter_page(data, chapter_id, classic_meta, idioms=None):
+def generate_chapter_page(corpus, chapter_id, classic_meta, idioms=None):
     """生成单章页面"""
+    data = corpus.data
     classic_id = classic_meta['id']
     short_name = classic_meta['short_name']
     icon = classic_meta.get('icon', '☯')
@@ -734,17 +735,17 @@ def generate_chapter_page(data, chapter_id, classic_meta, idioms=None):
     chapter_unit = '篇' if classic_id == 'zzj' else '章'
     total_chapters = classic_meta.get('chapters', len(data['chapters']))
 
-    chapter = next((c for c in data['chapters'] if c['chapter'] == chapter_id), None)
+    chapter = corpus.get_chapter(chapter_id)
     if not chapter:
         return None
 
     # 获取相邻章节
-    idx = data['chapters'].index(chapter)
-    prev_chapter = data['chapters'][idx - 1] if idx > 0 else None
-    next_chapter = data['chapters'][idx + 1] if idx < len(data['chapters']) - 1 else None
+    prev_chapter, next_chapter = corpus.get_neighbours(chapter_id)
 
-    # 使用服务层的标注函数
-    original_annotated = annotate_difficult_chars(chapter.get('original', ''))
+    # 使用服务层的标注函数（各经典使用各自的词典）
+    original_annotated = ClassicService(classic_id).get_glossary().annotate_chapter(
+        chapter_id, chapter.get('original', '')
+    )
 
     chapter_list = generate_chapter_list_html(data['chapters'], classic_id, chapter_id)
 
@@ -1029,8 +1030,9 @@ def generate_site():
         (classic_dir / 'all-chapters.html').write_text(all_html, encoding='utf-8')
 
         # 生成章节页面
+        corpus = Corpus(classic_id, data)
         for ch in data['chapters']:
-            html = generate_chapter_page(data, ch['chapter'], classic_meta, idioms)
+            html = generate_chapter_page(corpus, ch['chapter'], classic_meta, idioms)
             if html:
                 (classic_dir / f"chapter{ch['chapter']}.html").write_text(html, encoding='utf-8')
 
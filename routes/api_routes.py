@@ -4,40 +4,97 @@ API 路由 - JSON API 端点
 支持多经典：道德经、庄子等
 """
 
-from flask import Blueprint, jsonify, request
-from services.classic_service import ClassicService, get_all_classics, get_default_classic_id
-from services.tts_service import fish_audio_service, edge_tts_service
-from services.knowledge_graph import (
-    get_chapter_knowledge_graph,
-    get_all_concepts
+import json
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from services.classic_service import (
+    ClassicService,
+    get_all_classics,
+    get_default_classic_id,
+    get_classic_version,
+    get_metadata_version,
+    project_fields,
+    search_all_classics,
+    validate_classic_id
 )
-from services.semantic_archaeology import (
-    get_chapter_archaeology,
-    get_concept_interpretation_history
+from services.warmup import warmup_state
+from utils.validators import (
+    validate_search_query,
+    validate_pagination,
+    validate_chapter_range,
+    parse_field_list
 )
-from services.cross_civilization_dialogue import (
-    get_available_philosophers,
-    start_philosophy_dialogue,
-    get_comparative_analysis,
-    get_concept_correspondences
-)
-from services.virtual_commentator import (
-    get_available_commentators,
-    get_commentator_persona,
-    generate_commentary_response
-)
-from utils.validators import validate_search_query
 from utils.security import rate_limit
+from utils.http_cache import conditional_get
+
+# 知识图谱、语义考古、跨文明对话、虚拟注释家与 TTS 服务在各视图内按需导入，
+# 避免冷启动时加载 requests 及大量人设数据
 
 bp = Blueprint('api', __name__, url_prefix='/api')
 
 
+def _ndjson_response(records) -> Response:
+    """
+    以 NDJSON（每行一个 JSON 对象）流式返回记录
+
+    Args:
+        records: 可迭代的记录（通常为生成器）
+
+    Returns:
+        分块传输的流式响应
+    """
+    def generate():
+        for record in records:
+            # 二进制语料中的章节为只读 Mapping，编码时转为字典
+            yield json.dumps(record, ensure_ascii=False, default=dict) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+def _classic_version(classic_id, *_args, **_kwargs) -> str:
+    """条件请求版本：指定经典的数据版本"""
+    return get_classic_version(classic_id)
+
+
+def _ddj_version(*_args, **_kwargs) -> str:
+    """条件请求版本：道德经数据版本（知识图谱等分析功能）"""
+    return get_classic_version('ddj')
+
+
+def _projection_args():
+    """
+    读取字段投影参数 ?fields= 与 ?exclude=
+
+    Returns:
+        (fields, exclude)，未提供时为 None
+    """
+    return (
+        parse_field_list(request.args.get('fields')),
+        parse_field_list(request.args.get('exclude'))
+    )
+
+
+# ============ 运行状态 API ============
+
+@bp.route('/health')
+def api_health():
+    """API: 健康检查（预热完成前返回 503，供负载均衡判断实例是否就绪）"""
+    state = warmup_state.to_dict()
+    status_code = 200 if state['ready'] else 503
+    return jsonify({'status': 'ok' if state['ready'] else 'warming', 'warmup': state}), status_code
+
+
 # ============ 经典管理 API ============
 
 @bp.route('/classics')
+@conditional_get(get_metadata_version)
 def api_classics():
-    """API: 获取所有经典列表"""
-    classics = get_all_classics()
+    """API: 获取所有经典列表（支持 ?fields= / ?exclude= 字段投影）"""
+    fields, exclude = _projection_args()
+    classics = [
+        project_fields(classic, fields, exclude, key_field='id')
+        for classic in get_all_classics()
+    ]
     return jsonify({
         'classics': classics,
         'default': get_default_classic_id()
@@ -45,15 +102,18 @@ def api_classics():
 
 
 @bp.route('/<classic_id>/meta')
+@conditional_get(_classic_version)
 def api_classic_meta(classic_id):
-    """API: 获取指定经典的元数据"""
+    """API: 获取指定经典的元数据（支持 ?fields= / ?exclude= 字段投影）"""
     service = ClassicService(classic_id)
-    return jsonify(service.to_dict())
+    fields, exclude = _projection_args()
+    return jsonify(project_fields(service.to_dict(), fields, exclude, key_field='id'))
 
 
 # ============ 章节内容 API ============
 
 @bp.route('/<classic_id>/chapters')
+@conditional_get(_classic_version)
 def api_chapters(classic_id):
     """API: 获取经典所有章节列表"""
     service = ClassicService(classic_id)
@@ -74,19 +134,32 @@ def api_chapters(classic_id):
 
 
 @bp.route('/<classic_id>/chapter/<int:chapter_id>')
+@conditional_get(_classic_version)
 def api_chapter(classic_id, chapter_id):
-    """API: 获取单章数据"""
+    """API: 获取单章数据（支持 ?fields= / ?exclude= 字段投影）"""
     service = ClassicService(classic_id)
     chapter = service.get_chapter_with_annotation(chapter_id)
     if chapter:
-        return jsonify(chapter)
+        fields, exclude = _projection_args()
+        return jsonify(chapter.project(fields, exclude))
     return jsonify({'error': 'Chapter not found'}), 404
 
 
+@bp.route('/<classic_id>/export')
+@conditional_get(_classic_version)
+def api_export(classic_id):
+    """API: 以 NDJSON 流导出经典全部章节（支持 ?fields= / ?exclude= 字段投影）"""
+    if not validate_classic_id(classic_id):
+        return jsonify({'error': 'Classic not found'}), 404
+    service = ClassicService(classic_id)
+    fields, exclude = _projection_args()
+    return _ndjson_response(service.iter_chapters(fields, exclude))
+
+
 @bp.route('/<classic_id>/search')
-@rate_limit(max_requests=30, window=60)
+@rate_limit(max_requests=120, window=60, group='search')
 def api_search(classic_id):
-    """API: 搜索章节（带输入验证和速率限制）"""
+    """API: 搜索章节（带输入验证、分页和速率限制，?limit= 与 ?per_page= 等价）"""
     query = request.args.get('q', '')
 
     # 验证输入
@@ -94,9 +167,35 @@ def api_search(classic_id):
     if not is_valid and query:
         return jsonify({'error': error_msg}), 400
 
+    page, per_page = validate_pagination(
+        request.args.get('page', 1),
+        request.args.get('per_page', request.args.get('limit', 20))
+    )
     service = ClassicService(classic_id)
-    results = service.search_chapters(query)
-    return jsonify({'query': query, 'classic_id': classic_id, 'results': results})
+    result = service.search_chapters_page(query, page, per_page)
+    result['classic_id'] = classic_id
+    return jsonify(result)
+
+
+@bp.route('/search')
+@rate_limit(max_requests=120, window=60, group='search')
+def api_search_all():
+    """API: 跨经典检索（合并排序、分页、各经典命中数）"""
+    query = request.args.get('q', '')
+
+    # 验证输入
+    is_valid, error_msg = validate_search_query(query)
+    if not is_valid and query:
+        return jsonify({'error': error_msg}), 400
+
+    page, per_page = validate_pagination(
+        request.args.get('page', 1),
+        request.args.get('per_page', 20)
+    )
+    classics = request.args.get('classics')
+    classic_ids = [c for c in classics.split(',') if c] if classics else None
+
+    return jsonify(search_all_classics(query, page, per_page, classic_ids))
 
 
 # ============ 向后兼容 API ============
@@ -114,23 +213,26 @@ def api_daodejing_chapter(chapter_id):
 
 
 @bp.route('/daodejing/search')
-@rate_limit(max_requests=30, window=60)
 def api_daodejing_search():
-    """API: 搜索道德经章节（向后兼容）"""
+    """API: 搜索道德经章节（向后兼容，限流由 api_search 计一次）"""
     return api_search('ddj')
 
 
 @bp.route('/tts/fish-audio', methods=['POST'])
-@rate_limit(max_requests=10, window=60)
+@rate_limit(max_requests=10, window=60, group='tts:fish-audio')
 def fish_audio():
     """API: Fish Audio TTS 代理（带速率限制）"""
+    from services.tts_service import fish_audio_service
+
     return fish_audio_service.synthesize()
 
 
 @bp.route('/tts/edge', methods=['POST'])
-@rate_limit(max_requests=20, window=60)
+@rate_limit(max_requests=20, window=60, group='tts:edge')
 def edge_tts():
     """API: Edge TTS 代理（带速率限制）"""
+    from services.tts_service import edge_tts_service
+
     return edge_tts_service.synthesize()
 
 
@@ -138,23 +240,58 @@ def edge_tts():
 
 # 知识图谱 API
 @bp.route('/knowledge/concepts')
+@conditional_get(_ddj_version)
 def api_concepts():
     """API: 获取所有概念列表"""
+    from services.knowledge_graph import get_all_concepts
+
     concepts = get_all_concepts()
     return jsonify({'concepts': concepts})
 
 
 @bp.route('/knowledge/graph/<int:chapter_id>')
+@conditional_get(_ddj_version)
 def api_knowledge_graph(chapter_id):
-    """API: 获取章节知识图谱"""
-    graph = get_chapter_knowledge_graph(chapter_id)
+    """API: 获取章节知识图谱（默认返回本章子图，?full=1 返回全局图谱）"""
+    from services.knowledge_graph import get_chapter_knowledge_graph
+
+    full = request.args.get('full', '').lower() in ('1', 'true', 'yes')
+    graph = get_chapter_knowledge_graph(chapter_id, full=full)
     return jsonify(graph)
 
 
+@bp.route('/knowledge/spectrum')
+@conditional_get(_ddj_version)
+def api_knowledge_spectrum():
+    """API: 批量获取章节注释观点谱系（NDJSON 流，如 ?chapters=1-81）"""
+    from services.knowledge_graph import iter_commentary_spectra
+
+    chapter_ids, error = validate_chapter_range(request.args.get('chapters', ''))
+    if error:
+        return jsonify({'error': error}), 400
+    return _ndjson_response(iter_commentary_spectra(chapter_ids))
+
+
+@bp.route('/knowledge/similar/<int:chapter_id>/<commentator>')
+@conditional_get(_ddj_version)
+def api_similar_commentaries(chapter_id, commentator):
+    """API: 查找全书范围内与指定注释相近的注释"""
+    from services.commentary_similarity import find_similar_commentaries
+
+    limit = request.args.get('limit', 10, type=int)
+    limit = max(1, min(limit, 50))
+    result = find_similar_commentaries(chapter_id, commentator, limit)
+    if not result['indexed']:
+        return jsonify({'error': 'Commentary not found'}), 404
+    return jsonify(result)
+
+
 # 语义考古学 API
 @bp.route('/archaeology/<int:chapter_id>')
 def api_archaeology(chapter_id):
     """API: 获取章节语义考古分析"""
+    from services.semantic_archaeology import get_chapter_archaeology
+
     result = get_chapter_archaeology(chapter_id)
     return jsonify(result)
 
@@ -162,6 +299,8 @@ def api_archaeology(chapter_id):
 @bp.route('/archaeology/<int:chapter_id>/concept/<concept>')
 def api_concept_history(chapter_id, concept):
     """API: 获取概念阐释历史"""
+    from services.semantic_archaeology import get_concept_interpretation_history
+
     result = get_concept_interpretation_history(chapter_id, concept)
     return jsonify(result)
 
@@ -170,6 +309,8 @@ def api_concept_history(chapter_id, concept):
 @bp.route('/dialogue/philosophers')
 def api_philosophers():
     """API: 获取可用哲学家列表"""
+    from services.cross_civilization_dialogue import get_available_philosophers
+
     philosophers = get_available_philosophers()
     return jsonify({'philosophers': philosophers})
 
@@ -177,6 +318,8 @@ def api_philosophers():
 @bp.route('/dialogue/start', methods=['POST'])
 def api_start_dialogue():
     """API: 发起哲学对话"""
+    from services.cross_civilization_dialogue import start_philosophy_dialogue
+
     data = request.get_json() or {}
     chapter_id = data.get('chapter_id', 1)
     concept = data.get('concept', '道')
@@ -190,6 +333,8 @@ def api_start_dialogue():
 @bp.route('/dialogue/compare', methods=['POST'])
 def api_compare_philosophers():
     """API: 跨文明比较分析"""
+    from services.cross_civilization_dialogue import get_comparative_analysis
+
     data = request.get_json() or {}
     chapter_id = data.get('chapter_id', 1)
     concept = data.get('concept', '道')
@@ -202,6 +347,8 @@ def api_compare_philosophers():
 @bp.route('/dialogue/correspondence/<concept>/<philosopher_id>')
 def api_correspondences(concept, philosopher_id):
     """API: 获取概念对应关系"""
+    from services.cross_civilization_dialogue import get_concept_correspondences
+
     correspondences = get_concept_correspondences(concept, philosopher_id)
     return jsonify({'concept': concept, 'philosopher': philosopher_id, 'correspondences': correspondences})
 
@@ -210,6 +357,8 @@ def api_correspondences(concept, philosopher_id):
 @bp.route('/commentary/commentators')
 def api_commentators():
     """API: 获取可用注释家列表"""
+    from services.virtual_commentator import get_available_commentators
+
     commentators = get_available_commentators()
     return jsonify({'commentators': commentators})
 
@@ -217,6 +366,8 @@ def api_commentators():
 @bp.route('/commentary/persona/<commentator_id>')
 def api_commentator_persona(commentator_id):
     """API: 获取注释家人设"""
+    from services.virtual_commentator import get_commentator_persona
+
     persona = get_commentator_persona(commentator_id)
     if persona:
         return jsonify(persona)
@@ -226,6 +377,8 @@ def api_commentator_persona(commentator_id):
 @bp.route('/commentary/chat', methods=['POST'])
 def api_commentary_chat():
     """API: 虚拟注释家对话"""
+    from services.virtual_commentator import generate_commentary_response
+
     data = request.get_json() or {}
     commentator_id = data.get('commentator_id', 'wangbi')
     chapter_id = data.get('chapter_id', 1)
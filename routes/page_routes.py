@@ -8,13 +8,26 @@ from flask import Blueprint, render_template, redirect, url_for
 from services.classic_service import (
     ClassicService,
     get_all_classics,
+    get_classic_version,
     get_default_classic_id,
     validate_classic_id
 )
+from services.page_cache import PAGE_VARY, cached_page
+from utils.http_cache import conditional_get
 
 bp = Blueprint('pages', __name__)
 
 
+def _classic_version(classic_id, *_args, **_kwargs) -> str:
+    """条件请求版本：指定经典的数据版本"""
+    return get_classic_version(classic_id)
+
+
+def _ddj_version(*_args, **_kwargs) -> str:
+    """条件请求版本：道德经数据版本（向后兼容路由）"""
+    return get_classic_version('ddj')
+
+
 def get_classic_from_request(default=None):
     """
     从请求中获取经典ID，如果没有指定则使用默认值
@@ -37,6 +50,8 @@ def index():
 
 
 @bp.route('/<classic_id>/')
+@conditional_get(_classic_version, templates=True, vary=PAGE_VARY)
+@cached_page(_classic_version)
 def classic_index(classic_id):
     """经典首页 - 章节目录"""
     if not validate_classic_id(classic_id):
@@ -56,6 +71,8 @@ def classic_index(classic_id):
 
 
 @bp.route('/<classic_id>/chapter/<int:chapter_id>')
+@conditional_get(_classic_version, templates=True, vary=PAGE_VARY)
+@cached_page(_classic_version)
 def chapter_view(classic_id, chapter_id):
     """单章阅读页"""
     if not validate_classic_id(classic_id):
@@ -81,9 +98,11 @@ def chapter_view(classic_id, chapter_id):
 
 
 @bp.route('/<classic_id>/compare/<int:chapter_id>')
+@conditional_get(_classic_version, templates=True, vary=PAGE_VARY)
+@cached_page(_classic_version)
 def compare_view(classic_id, chapter_id):
     """多版本对照页"""
-    if not ClassicService.validate_classic_id(classic_id):
+    if not validate_classic_id(classic_id):
         return redirect(url_for('pages.classic_index', classic_id=get_default_classic_id()))
 
     service = ClassicService(classic_id)
@@ -108,6 +127,8 @@ def compare_view(classic_id, chapter_id):
 # ============ 向后兼容路由 ============
 
 @bp.route('/daodejing/')
+@conditional_get(_ddj_version, templates=True, vary=PAGE_VARY)
+@cached_page(_ddj_version)
 def daodejing_index():
     """道德经首页 - 向后兼容（直接渲染）"""
     service = ClassicService('ddj')
@@ -124,6 +145,8 @@ def daodejing_index():
 
 
 @bp.route('/daodejing/chapter/<int:chapter_id>')
+@conditional_get(_ddj_version, templates=True, vary=PAGE_VARY)
+@cached_page(_ddj_version)
 def daodejing_chapter_view(chapter_id):
     """道德经单章阅读页 - 向后兼容（直接渲染）"""
     service = ClassicService('ddj')
@@ -146,6 +169,8 @@ def daodejing_chapter_view(chapter_id):
 
 
 @bp.route('/daodejing/compare/<int:chapter_id>')
+@conditional_get(_ddj_version, templates=True, vary=PAGE_VARY)
+@cached_page(_ddj_version)
 def daodejing_compare_view(chapter_id):
     """道德经多版本对照页 - 向后兼容（直接渲染）"""
     service = ClassicService('ddj')
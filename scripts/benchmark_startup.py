@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+冷启动基准测试
+在全新的 Python 进程中加载 Vercel 入口（api/index.py），测量从导入到应用就绪的耗时，
+检查按需加载的模块未被提前导入，并与冷启动预算比较
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+# 冷启动预算（秒），可用环境变量 COLD_START_BUDGET 覆盖
+DEFAULT_BUDGET = float(os.environ.get('COLD_START_BUDGET', 1.0))
+
+# 冷启动时不应加载的模块（首次使用时才导入）
+LAZY_MODULES = (
+    'requests',
+    'services.tts_service',
+    'services.knowledge_graph',
+    'services.semantic_archaeology',
+    'services.cross_civilization_dialogue',
+    'services.virtual_commentator',
+    'services.commentary_similarity',
+)
+
+# 子进程中执行的测量代码
+_PROBE = '''
+import gc, json, runpy, sys, time
+start = time.perf_counter()
+runpy.run_path({entry!r})
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "elapsed": elapsed,
+    "loaded": [m for m in {lazy!r} if m in sys.modules],
+    "apps": sum(1 for o in gc.get_objects() if type(o) is sys.modules["flask"].Flask)
+}}))
+'''
+
+
+def measure_cold_start() -> Dict:
+    """
+    在全新进程中测量一次冷启动
+
+    Returns:
+        {'elapsed': 秒, 'loaded': 被提前导入的按需模块, 'apps': 进程中的应用实例数}
+    """
+    probe = _PROBE.format(entry=str(PROJECT_DIR / 'api' / 'index.py'), lazy=LAZY_MODULES)
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1', WARMUP='0')
+    result = subprocess.run(
+        [sys.executable, '-c', probe],
+        cwd=str(PROJECT_DIR),
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run_benchmark(runs: int = 5, budget: float = DEFAULT_BUDGET) -> Dict:
+    """
+    多次测量冷启动并与预算比较
+
+    Args:
+        runs: 测量次数
+        budget: 冷启动预算（秒），按中位数比较
+
+    Returns:
+        测量汇总，passed 表示中位数在预算内、没有提前加载按需模块且只创建了一个应用
+    """
+    samples: List[Dict] = [measure_cold_start() for _ in range(runs)]
+    timings = [s['elapsed'] for s in samples]
+    loaded = sorted({m for s in samples for m in s['loaded']})
+    apps = max(s['apps'] for s in samples)
+    median = statistics.median(timings)
+    return {
+        'runs': runs,
+        'budget': budget,
+        'min': round(min(timings), 4),
+        'median': round(median, 4),
+        'max': round(max(timings), 4),
+        'eager_modules': loaded,
+        'apps': apps,
+        'passed': median <= budget and not loaded and apps == 1
+    }
+
+
+def main():
+    """命令行入口"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="冷启动基准测试")
+    parser.add_argument("--runs", type=int, default=5, help="测量次数")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help="冷启动预算（秒）")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.runs, args.budget)
+    print(f"冷启动 {report['runs']} 次：最快 {report['min']}s，中位数 {report['median']}s，"
+          f"最慢 {report['max']}s（预算 {report['budget']}s）")
+    if report['eager_modules']:
+        print(f"提前加载的按需模块：{', '.join(report['eager_modules'])}")
+    if report['apps'] != 1:
+        print(f"创建了 {report['apps']} 个应用实例")
+    print("通过" if report['passed'] else "未通过")
+    sys.exit(0 if report['passed'] else 1)
+
+
+if __name__ == "__main__":
+    main()
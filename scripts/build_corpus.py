@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+二进制语料构建
+将 classics.json 中登记的每部经典编译为与数据文件同目录的 .corpus 文件，
+运行时若产物存在且与数据文件内容一致，则以 mmap 加载代替解析 JSON
+
+产物随仓库提交（部署不执行构建步骤）：修改数据文件后运行本脚本并提交生成的 .corpus 文件；
+内容未变的产物不会重写，--check 只检查产物是否与数据文件一致
+"""
+
+import sys
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_DIR))
+
+from services.binary_corpus import build_corpus_file, open_binary_corpus  # noqa: E402
+from services.classic_service import ClassicService, get_all_classics  # noqa: E402
+
+
+def main():
+    """命令行入口"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="二进制语料构建")
+    parser.add_argument("--check", action="store_true", help="只检查产物是否最新，过期时返回非零状态")
+    args = parser.parse_args()
+
+    stale = []
+    for classic in get_all_classics():
+        service = ClassicService(classic['id'])
+        if not service.data_file.exists():
+            print(f"跳过 {classic['id']}：数据文件不存在")
+            continue
+
+        corpus = open_binary_corpus(service.data_file)
+        if corpus is not None:
+            corpus.close()
+            print(f"{classic['id']}: 已是最新")
+            continue
+        if args.check:
+            stale.append(classic['id'])
+            print(f"{classic['id']}: 产物缺失或已过期")
+            continue
+
+        target = build_corpus_file(service.data_file)
+        print(f"{classic['id']}: {service.data_file.name} -> {target.name} "
+              f"({target.stat().st_size / 1024:.0f} KB)")
+
+    if stale:
+        print("请运行 python scripts/build_corpus.py 并提交生成的 .corpus 文件")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
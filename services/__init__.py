@@ -5,7 +5,22 @@
 
 from services.data_service import DataService
 from services.annotation_service import annotate_difficult_chars, DIFFICULT_CHARS
-from services.tts_service import fish_audio_service, edge_tts_service
+
+# TTS 服务依赖 requests，首次访问时再加载
+_LAZY_ATTRIBUTES = {
+    'fish_audio_service': 'services.tts_service',
+    'edge_tts_service': 'services.tts_service',
+}
+
+
+def __getattr__(name):
+    """按需加载较重的服务模块"""
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module 'services' has no attribute '{name}'")
+    import importlib
+    return getattr(importlib.import_module(module_name), name)
+
 
 __all__ = [
     'DataService',
@@ -0,0 +1,373 @@
+# -*- coding: utf-8 -*-
+"""
+二进制语料 - 预编译的经典数据
+构建步骤将每部经典的 JSON 数据编译为紧凑的二进制文件（字符串表 + 偏移索引），
+加载时以 mmap 映射，按需解码单个字段，无需解析整个 JSON
+
+文件布局（小端序）：
+    头部      magic, 格式版本, 源文件 SHA-256, 各段长度
+    元数据    JSON：除章节外的顶层字段、字段名表、章节编号表
+    字符串索引  每个字符串的 (偏移, 长度)
+    记录索引    每章的 (首个条目, 条目数)
+    条目        每个字段的 (字段名序号, 字符串序号, 值类型)
+    字符串数据  UTF-8 字节（相同取值只存一份）
+"""
+
+import json
+import mmap
+import os
+import struct
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+from utils.http_cache import file_digest
+
+MAGIC = b'CLSC'
+FORMAT_VERSION = 1
+
+# 编译产物与源 JSON 同目录，扩展名替换为 .corpus
+ARTIFACT_SUFFIX = '.corpus'
+
+# 值类型：字符串直接存 UTF-8，其他类型（如章节编号）存 JSON
+KIND_STR = 0
+KIND_JSON = 1
+
+_HEADER = struct.Struct('<4sHH32sIIII')
+_SPAN = struct.Struct('<II')
+_ENTRY = struct.Struct('<III')
+
+
+class CorpusFormatError(ValueError):
+    """二进制语料文件格式错误"""
+
+
+def artifact_path(data_file: Union[str, Path]) -> Path:
+    """
+    数据文件对应的二进制语料路径
+
+    Args:
+        data_file: JSON 数据文件路径
+
+    Returns:
+        二进制语料路径
+    """
+    return Path(data_file).with_suffix(ARTIFACT_SUFFIX)
+
+
+def compile_corpus(data: Dict, source_digest: str = '',
+                   source_stat: Optional[Tuple[int, int]] = None) -> bytes:
+    """
+    将经典数据编译为二进制语料
+
+    Args:
+        data: 已解析的经典数据（含 chapters）
+        source_digest: 源 JSON 文件的 SHA-256（十六进制，用于判断是否过期）
+        source_stat: 源文件的 (修改时间纳秒, 大小)，未变化时打开产物无需重新计算哈希
+
+    Returns:
+        二进制语料内容
+    """
+    chapters = data.get('chapters', [])
+    fields: Dict[str, int] = {}
+    strings: Dict[bytes, int] = {}
+    string_spans: List[Tuple[int, int]] = []
+    string_data = bytearray()
+    records: List[Tuple[int, int]] = []
+    entries: List[Tuple[int, int, int]] = []
+
+    def intern(raw: bytes) -> int:
+        string_id = strings.get(raw)
+        if string_id is None:
+            string_id = strings[raw] = len(string_spans)
+            string_spans.append((len(string_data), len(raw)))
+            string_data.extend(raw)
+        return string_id
+
+    for chapter in chapters:
+        records.append((len(entries), len(chapter)))
+        for field, value in chapter.items():
+            field_id = fields.setdefault(field, len(fields))
+            if isinstance(value, str):
+                entries.append((field_id, intern(value.encode('utf-8')), KIND_STR))
+            else:
+                raw = json.dumps(value, ensure_ascii=False).encode('utf-8')
+                entries.append((field_id, intern(raw), KIND_JSON))
+
+    meta = {key: value for key, value in data.items() if key != 'chapters'}
+    meta_raw = json.dumps({
+        'meta': meta,
+        'fields': list(fields),
+        'chapter_ids': [chapter.get('chapter') for chapter in chapters],
+        'source_stat': list(source_stat) if source_stat else None
+    }, ensure_ascii=False).encode('utf-8')
+
+    digest = bytes.fromhex(source_digest) if source_digest else b''
+    parts = [
+        _HEADER.pack(MAGIC, FORMAT_VERSION, 0, digest.ljust(32, b'\0'),
+                     len(meta_raw), len(string_spans), len(records), len(entries)),
+        meta_raw,
+        b''.join(_SPAN.pack(*span) for span in string_spans),
+        b''.join(_SPAN.pack(*record) for record in records),
+        b''.join(_ENTRY.pack(*entry) for entry in entries),
+        bytes(string_data)
+    ]
+    return b''.join(parts)
+
+
+def build_corpus_file(data_file: Union[str, Path],
+                      target: Optional[Union[str, Path]] = None) -> Path:
+    """
+    编译数据文件为二进制语料（先写临时文件再原子替换）
+
+    Args:
+        data_file: JSON 数据文件路径
+        target: 输出路径，默认与数据文件同目录
+
+    Returns:
+        输出路径
+    """
+    data_file = Path(data_file)
+    target = Path(target) if target else artifact_path(data_file)
+    with open(data_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    stat = os.stat(data_file)
+    content = compile_corpus(data, file_digest(data_file), (stat.st_mtime_ns, stat.st_size))
+    tmp_path = target.with_name(f'{target.name}.{os.getpid()}.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, target)
+    return target
+
+
+class BinaryCorpus:
+    """
+    以 mmap 映射的二进制语料
+    加载时只解析头部与元数据，字段在读取时才从映射中解码
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Args:
+            path: 二进制语料路径
+
+        Raises:
+            OSError: 文件无法打开
+            CorpusFormatError: 文件格式错误或版本不符
+        """
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            try:
+                self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise CorpusFormatError('empty corpus file')
+
+        try:
+            (magic, version, _reserved, digest, meta_len,
+             n_strings, n_records, n_entries) = _HEADER.unpack_from(self._buffer, 0)
+        except struct.error:
+            self.close()
+            raise CorpusFormatError('truncated header')
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise CorpusFormatError('unsupported corpus format')
+
+        self.source_digest = digest.rstrip(b'\0').hex()
+        meta_start = _HEADER.size
+        self._strings_start = meta_start + meta_len
+        self._records_start = self._strings_start + n_strings * _SPAN.size
+        self._entries_start = self._records_start + n_records * _SPAN.size
+        self._data_start = self._entries_start + n_entries * _ENTRY.size
+        self._n_records = n_records
+        if self._data_start > len(self._buffer):
+            self.close()
+            raise CorpusFormatError('truncated corpus file')
+
+        info = json.loads(self._buffer[meta_start:self._strings_start].decode('utf-8'))
+        self.meta: Dict = info['meta']
+        self.fields: List[str] = info['fields']
+        self.chapter_ids: List[int] = info['chapter_ids']
+        source_stat = info.get('source_stat')
+        self.source_stat: Optional[Tuple[int, int]] = tuple(source_stat) if source_stat else None
+        self._positions: Dict[int, int] = {
+            chapter_id: index for index, chapter_id in enumerate(self.chapter_ids)
+        }
+        self._field_ids: Dict[str, int] = {name: i for i, name in enumerate(self.fields)}
+
+    def __len__(self) -> int:
+        return self._n_records
+
+    def close(self):
+        """解除映射"""
+        self._buffer.close()
+
+    def read_value(self, string_id: int, kind: int):
+        """
+        解码字符串表中的一个值
+
+        Args:
+            string_id: 字符串序号
+            kind: 值类型
+
+        Returns:
+            解码后的值
+        """
+        offset, length = _SPAN.unpack_from(self._buffer, self._strings_start + string_id * _SPAN.size)
+        start = self._data_start + offset
+        text = self._buffer[start:start + length].decode('utf-8')
+        return text if kind == KIND_STR else json.loads(text)
+
+    def iter_entries(self, index: int) -> Iterator[Tuple[str, int, int]]:
+        """
+        遍历第 index 条记录的字段（不解码取值）
+
+        Args:
+            index: 记录序号（按源文件中的章节顺序）
+
+        Yields:
+            (字段名, 字符串序号, 值类型)
+        """
+        first, count = _SPAN.unpack_from(self._buffer, self._records_start + index * _SPAN.size)
+        position = self._entries_start + first * _ENTRY.size
+        for _ in range(count):
+            field_id, string_id, kind = _ENTRY.unpack_from(self._buffer, position)
+            yield self.fields[field_id], string_id, kind
+            position += _ENTRY.size
+
+    def get_field(self, chapter_id: int, field: str, default=None):
+        """
+        读取单章的单个字段（只解码该字段）
+
+        Args:
+            chapter_id: 章节编号
+            field: 字段名
+            default: 章节或字段不存在时的返回值
+
+        Returns:
+            字段值
+        """
+        index = self._positions.get(chapter_id)
+        if index is None or field not in self._field_ids:
+            return default
+        for name, string_id, kind in self.iter_entries(index):
+            if name == field:
+                return self.read_value(string_id, kind)
+        return default
+
+    def get_record(self, index: int) -> Dict:
+        """
+        解码第 index 条记录的全部字段
+
+        Args:
+            index: 记录序号
+
+        Returns:
+            章节数据字典
+        """
+        return {
+            name: self.read_value(string_id, kind)
+            for name, string_id, kind in self.iter_entries(index)
+        }
+
+    def to_data(self) -> Dict:
+        """
+        解码为与 JSON 数据文件相同结构的字典
+
+        Returns:
+            经典数据
+        """
+        data = dict(self.meta)
+        data['chapters'] = [self.get_record(index) for index in range(self._n_records)]
+        return data
+
+    def to_lazy_data(self) -> Dict:
+        """
+        生成与 JSON 数据文件相同结构的数据，章节为按需解码的 LazyRecord
+
+        Returns:
+            经典数据
+        """
+        data = dict(self.meta)
+        data['chapters'] = [LazyRecord(self, index) for index in range(self._n_records)]
+        return data
+
+
+class LazyRecord(Mapping):
+    """
+    按需解码的只读章节记录
+    字段在 mmap 中以字节区间保存，每次访问时解码为 str，记录本身不保留解码结果：
+    检索等遍历全部字段的操作结束后字符串即可回收，常驻内存的只有字段索引，
+    fork 出的多个 worker 通过页缓存共享同一份映射
+    """
+
+    __slots__ = ('_corpus', '_index', '_entries')
+
+    def __init__(self, corpus: BinaryCorpus, index: int):
+        """
+        Args:
+            corpus: 所属二进制语料
+            index: 记录序号
+        """
+        self._corpus = corpus
+        self._index = index
+        # 字段名 -> (字符串序号, 值类型)，首次访问时建立
+        self._entries: Optional[Dict[str, Tuple[int, int]]] = None
+
+    def _get_entries(self) -> Dict[str, Tuple[int, int]]:
+        """读取本记录的字段索引（不解码取值）"""
+        entries = self._entries
+        if entries is None:
+            entries = {
+                name: (string_id, kind)
+                for name, string_id, kind in self._corpus.iter_entries(self._index)
+            }
+            self._entries = entries
+        return entries
+
+    def __getitem__(self, key: str) -> Any:
+        string_id, kind = self._get_entries()[key]
+        return self._corpus.read_value(string_id, kind)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._get_entries()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._get_entries())
+
+    def __len__(self) -> int:
+        return len(self._get_entries())
+
+    def __repr__(self) -> str:
+        return f'<LazyRecord {self._index} of {self._corpus.path.name}>'
+
+
+def open_binary_corpus(data_file: Union[str, Path]) -> Optional[BinaryCorpus]:
+    """
+    打开数据文件对应的二进制语料（仅在未过期时）
+
+    Args:
+        data_file: JSON 数据文件路径
+
+    Returns:
+        BinaryCorpus 实例；产物不存在、格式不符或与源文件内容不一致时返回 None
+    """
+    path = artifact_path(data_file)
+    if not path.exists():
+        return None
+    try:
+        corpus = BinaryCorpus(path)
+    except (OSError, CorpusFormatError, ValueError):
+        return None
+
+    # 源文件的修改时间与大小与编译时一致则直接使用，否则按内容哈希校验；
+    # 部署时只携带编译产物（源文件不存在）也可直接使用
+    try:
+        stat = os.stat(data_file)
+    except OSError:
+        return corpus
+    if corpus.source_stat == (stat.st_mtime_ns, stat.st_size):
+        return corpus
+    if file_digest(data_file) != corpus.source_digest:
+        corpus.close()
+        return None
+    return corpus
@@ -6,24 +6,40 @@
 
 import json
 import os
+from collections.abc import Mapping
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Any
 from config import BASE_DIR, DATA_DIR
+from services.corpus_store import Corpus, corpus_store
+from services.glossary_service import GlossaryCache, clear_glossary_caches, get_glossary_cache
+from services.search_index import SearchIndex
+from utils.http_cache import combine_digests, file_digest
+from utils.single_flight import SingleFlight
 
 # 经典元数据缓存
 _classics_metadata_cache = None
 
-# 各经典数据缓存
-_classics_data_cache = {}
+# 合并并发的元数据首次加载
+_metadata_flight = SingleFlight()
+
+# 每个章节视图最多缓存的字段投影数
+MAX_CACHED_PROJECTIONS = 32
 
 
 def load_classics_metadata() -> Dict:
     """
-    加载所有经典元数据（带缓存）
+    加载所有经典元数据（带缓存，并发的首次加载只读取一次文件）
 
     Returns:
         包含所有经典元数据的字典
     """
+    if _classics_metadata_cache is not None:
+        return _classics_metadata_cache
+    return _metadata_flight.do('classics', _read_classics_metadata)
+
+
+def _read_classics_metadata() -> Dict:
+    """读取 classics.json 并缓存（由单飞加载的首个调用方执行）"""
     global _classics_metadata_cache
 
     if _classics_metadata_cache is not None:
@@ -47,6 +63,7 @@ def load_classics_metadata() -> Dict:
                     "era": "春秋末期",
                     "chapters": 81,
                     "data_file": "data/daodejing.json",
+                    "glossary": "data/daodejing/glossary.json",
                     "icon": "☯",
                     "color": "#d4a574",
                     "description": "道家哲学奠基之作"
@@ -97,6 +114,39 @@ def get_default_classic_id() -> str:
     return metadata.get("default_classic", "ddj")
 
 
+def get_metadata_version() -> str:
+    """
+    获取经典元数据（classics.json）的内容版本
+
+    Returns:
+        十六进制哈希
+    """
+    return file_digest(DATA_DIR / "classics.json")
+
+
+def get_classic_version(classic_id: str) -> str:
+    """
+    获取经典的内容版本（元数据、数据文件与当前生效词典的内容哈希）
+
+    Args:
+        classic_id: 经典ID
+
+    Returns:
+        十六进制哈希，任一文件内容变化时改变
+    """
+    service = ClassicService(classic_id)
+    # 使用标注实际所用词典的哈希，而不是磁盘上的最新文件：
+    # 词典缓存按检查间隔重新加载，在此之前渲染的页面不会记在新版本下
+    glossary = service.get_glossary()
+    glossary.refresh()
+    return combine_digests([
+        classic_id,
+        get_metadata_version(),
+        corpus_store.get_version(service.classic_id, service.data_file),
+        glossary.digest
+    ])
+
+
 def validate_classic_id(classic_id: str) -> bool:
     """
     验证经典ID是否有效
@@ -111,6 +161,145 @@ def validate_classic_id(classic_id: str) -> bool:
     return metadata is not None
 
 
+def project_fields(
+    record: Mapping,
+    fields: Optional[List[str]] = None,
+    exclude: Optional[List[str]] = None,
+    key_field: str = 'chapter'
+) -> Mapping:
+    """
+    按字段列表投影记录（始终保留主键字段）
+
+    Args:
+        record: 章节数据或元数据字典
+        fields: 需要的字段，为 None 时保留全部字段
+        exclude: 需要去除的字段
+        key_field: 主键字段名，投影后始终保留
+
+    Returns:
+        投影后的字典；未指定 fields 与 exclude 时原样返回 record
+    """
+    if fields is None and not exclude:
+        return record
+    keys = record.keys() if fields is None else [f for f in fields if f in record]
+    excluded = set(exclude or ()) - {key_field}
+    projected = {key_field: record[key_field]} if key_field in record else {}
+    for key in keys:
+        if key not in excluded:
+            projected[key] = record[key]
+    return projected
+
+
+def chapter_link(chapter: Optional[Dict]) -> Optional[Dict]:
+    """
+    生成章节的轻量引用
+
+    Args:
+        chapter: 章节数据字典
+
+    Returns:
+        {'id', 'title'} 字典，章节为空时返回 None
+    """
+    if chapter is None:
+        return None
+    return {
+        'id': chapter['chapter'],
+        'title': chapter.get('title', f'第{chapter["chapter"]}章')
+    }
+
+
+class ChapterView(Mapping):
+    """
+    带标注的只读章节视图
+    在共享的章节记录之上叠加标注原文、相邻章节引用和章节总数，
+    不修改底层缓存数据，可在多线程间安全共享
+    """
+
+    __slots__ = ('_record', '_extras', '_projections')
+
+    def __init__(self, record: Dict, extras: Dict):
+        """
+        Args:
+            record: 共享的章节记录（只读使用）
+            extras: 叠加字段
+        """
+        self._record = record
+        self._extras = extras
+        # 字段投影缓存 {(fields, exclude): 投影结果}
+        self._projections: Dict[tuple, Dict] = {}
+
+    @classmethod
+    def build(cls, corpus, chapter: Dict, glossary) -> 'ChapterView':
+        """
+        为章节生成视图
+
+        Args:
+            corpus: 章节所属语料
+            chapter: 章节数据字典
+            glossary: 本经典的词典缓存（GlossaryCache）
+
+        Returns:
+            ChapterView 实例
+        """
+        extras = {}
+        # 为原文添加疑难字标注
+        if 'original' in chapter:
+            extras['original_annotated'] = glossary.annotate_chapter(
+                chapter['chapter'], chapter.get('original', '')
+            )
+
+        # 相邻章节只保留轻量引用
+        prev_chapter, next_chapter = corpus.get_neighbours(chapter['chapter'])
+        extras['prev_chapter'] = chapter_link(prev_chapter)
+        extras['next_chapter'] = chapter_link(next_chapter)
+        extras['total_chapters'] = corpus.chapter_count
+        return cls(chapter, extras)
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._extras:
+            return self._extras[key]
+        return self._record[key]
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._record
+        for key in self._extras:
+            if key not in self._record:
+                yield key
+
+    def __len__(self) -> int:
+        return len(self._record) + sum(1 for key in self._extras if key not in self._record)
+
+    def to_dict(self) -> Dict:
+        """
+        转换为普通字典（用于 JSON 序列化）
+
+        Returns:
+            章节字段的浅拷贝
+        """
+        return dict(self)
+
+    def project(self, fields: Optional[List[str]] = None,
+                exclude: Optional[List[str]] = None) -> Dict:
+        """
+        按字段集合投影章节（按字段集合缓存，结果只读使用）
+
+        Args:
+            fields: 需要的字段，为 None 时保留全部字段
+            exclude: 需要去除的字段
+
+        Returns:
+            投影后的字典
+        """
+        key = (tuple(fields) if fields is not None else None, frozenset(exclude or ()))
+        projected = self._projections.get(key)
+        if projected is None:
+            projected = dict(project_fields(self, fields, exclude))
+            # 字段组合由客户端决定，限制缓存条目数
+            if len(self._projections) < MAX_CACHED_PROJECTIONS:
+                self._projections[key] = projected
+        return projected
+
+
 class ClassicService:
     """
     通用经典服务类
@@ -136,8 +325,25 @@ class ClassicService:
             self.metadata = get_classic_metadata(self.classic_id)
 
         self.data_file = BASE_DIR / self.metadata.get("data_file", "data/daodejing.json")
+        glossary = self.metadata.get("glossary")
+        self.glossary_file = BASE_DIR / glossary if glossary else None
         self.chapter_count = self.metadata.get("chapters", 81)
 
+    def get_corpus(self) -> Corpus:
+        """
+        获取经典语料（进程内共享，每部经典只解析一次）
+
+        Returns:
+            Corpus 实例；数据文件缺失时返回不缓存的空语料
+        """
+        corpus = corpus_store.get(self.classic_id, self.data_file)
+        if corpus is None:
+            return Corpus(self.classic_id, {
+                "title": self.metadata.get("name", ""),
+                "chapters": []
+            })
+        return corpus
+
     def load_data(self) -> Dict:
         """
         加载经典数据（带缓存）
@@ -145,41 +351,27 @@ class ClassicService:
         Returns:
             包含所有章节数据的字典
         """
-        global _classics_data_cache
-
-        cache_key = f"{self.classic_id}"
+        return self.get_corpus().data
 
-        if cache_key in _classics_data_cache:
-            return _classics_data_cache[cache_key]
+    def get_glossary(self) -> GlossaryCache:
+        """
+        获取本经典的疑难字词典（已编译，带章节标注缓存）
 
-        try:
-            with open(self.data_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            _classics_data_cache[cache_key] = data
-            return data
-        except FileNotFoundError:
-            return {
-                "title": self.metadata.get("name", ""),
-                "chapters": []
-            }
-        except json.JSONDecodeError:
-            return {
-                "title": self.metadata.get("name", ""),
-                "chapters": []
-            }
+        Returns:
+            GlossaryCache 实例
+        """
+        return get_glossary_cache(self.classic_id, self.glossary_file, self.data_file)
 
     def clear_cache(self):
         """清除当前经典的数据缓存"""
-        global _classics_data_cache
-        cache_key = f"{self.classic_id}"
-        if cache_key in _classics_data_cache:
-            del _classics_data_cache[cache_key]
+        corpus_store.invalidate(self.classic_id)
 
     @staticmethod
     def clear_all_cache():
         """清除所有经典的数据缓存"""
-        global _classics_data_cache, _classics_metadata_cache
-        _classics_data_cache = {}
+        global _classics_metadata_cache
+        corpus_store.clear()
+        clear_glossary_caches()
         _classics_metadata_cache = None
 
     def get_chapter(self, chapter_id: int) -> Optional[Dict]:
@@ -192,45 +384,92 @@ class ClassicService:
         Returns:
             章节数据字典，如果不存在则返回 None
         """
-        data = self.load_data()
-        chapter = next(
-            (c for c in data['chapters'] if c['chapter'] == chapter_id),
-            None
-        )
-        return chapter
+        return self.get_corpus().get_chapter(chapter_id)
 
-    def get_chapter_with_annotation(self, chapter_id: int) -> Optional[Dict]:
+    def get_field(self, chapter_id: int, field: str, default: Any = None) -> Any:
         """
-        获取指定章节的内容（带疑难字标注和相邻章节信息）
+        读取单章的单个字段
+        语料来自二进制文件时只解码该字段
 
         Args:
             chapter_id: 章节编号
+            field: 字段名
+            default: 章节或字段不存在时的返回值
 
         Returns:
-            包含标注内容和相邻章节信息的字典，如果不存在则返回 None
+            字段值
         """
-        from services.annotation_service import annotate_difficult_chars
+        corpus = self.get_corpus()
+        if corpus.binary is not None:
+            return corpus.binary.get_field(chapter_id, field, default)
+        chapter = corpus.get_chapter(chapter_id)
+        return chapter.get(field, default) if chapter else default
 
-        data = self.load_data()
-        chapter = next(
-            (c for c in data['chapters'] if c['chapter'] == chapter_id),
-            None
-        )
+    def get_chapter_with_annotation(self, chapter_id: int) -> Optional['ChapterView']:
+        """
+        获取指定章节的内容（带疑难字标注和相邻章节信息）
+        结果为只读视图，按 (经典, 章节) 缓存，不修改共享的章节数据；
+        标注使用本经典在 classics.json 中声明的词典
 
-        if chapter:
-            # 为原文添加疑难字标注
-            if 'original' in chapter:
-                chapter['original_annotated'] = annotate_difficult_chars(
-                    chapter.get('original', '')
-                )
+        Args:
+            chapter_id: 章节编号
+
+        Returns:
+            包含标注内容和相邻章节信息的 ChapterView，如果不存在则返回 None
+        """
+        corpus = self.get_corpus()
+        glossary = self.get_glossary()
+        glossary.refresh()
+
+        # 视图缓存按词典版本失效
+        cached = corpus.chapter_views.get(chapter_id)
+        if cached is not None and cached[0] == glossary.version:
+            return cached[1]
+
+        chapter = corpus.get_chapter(chapter_id)
+        if chapter is None:
+            return None
+
+        # 同一章节的并发未命中只构建一次视图
+        return corpus.flight.do(
+            ('chapter_view', chapter_id, glossary.version),
+            lambda: self._build_chapter_view(corpus, chapter, glossary)
+        )
 
-            # 获取相邻章节
-            idx = data['chapters'].index(chapter)
-            chapter['prev_chapter'] = data['chapters'][idx - 1] if idx > 0 else None
-            chapter['next_chapter'] = data['chapters'][idx + 1] if idx < len(data['chapters']) - 1 else None
-            chapter['total_chapters'] = len(data['chapters'])
+    @staticmethod
+    def _build_chapter_view(corpus: Corpus, chapter: Mapping, glossary: GlossaryCache) -> 'ChapterView':
+        """构建并缓存章节视图（由单飞加载的首个调用方执行）"""
+        version = glossary.version
+        cached = corpus.chapter_views.get(chapter['chapter'])
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        view = ChapterView.build(corpus, chapter, glossary)
+        corpus.chapter_views[chapter['chapter']] = (version, view)
+        return view
+
+    def prepare_corpus(self, corpus: Corpus, previous: Optional[Corpus] = None):
+        """
+        为重新加载的语料预先建立派生数据（替换前在后台执行）
+        只重建被替换语料已经建立过的部分：检索索引仅在旧语料有索引时建立，
+        章节视图仅为旧语料中已生成视图的章节生成，未被访问过的数据仍按需建立
 
-        return chapter
+        Args:
+            corpus: 新加载、尚未生效的语料
+            previous: 被替换的语料，为 None 时不预先建立任何数据
+        """
+        if previous is None:
+            return
+        if previous.search_index is not None:
+            corpus.search_index = SearchIndex(corpus.data.get('chapters', []))
+        chapter_ids = [chapter_id for chapter_id in previous.chapter_views
+                       if chapter_id in corpus.chapter_index]
+        if not chapter_ids:
+            return
+        glossary = self.get_glossary()
+        glossary.refresh(force=True)
+        for chapter_id in chapter_ids:
+            view = ChapterView.build(corpus, corpus.chapter_index[chapter_id], glossary)
+            corpus.chapter_views[chapter_id] = (glossary.version, view)
 
     def get_all_chapters(self) -> List[Dict]:
         """
@@ -242,40 +481,72 @@ class ClassicService:
         data = self.load_data()
         return data.get('chapters', [])
 
-    def search_chapters(self, query: str) -> List[Dict]:
+    def iter_chapters(self, fields: Optional[List[str]] = None,
+                      exclude: Optional[List[str]] = None) -> Iterator[Dict]:
         """
-        搜索章节
+        逐章生成章节数据（用于流式导出）
+
+        Args:
+            fields: 需要的字段，为 None 时返回全部字段
+            exclude: 需要去除的字段
+
+        Yields:
+            投影后的章节数据
+        """
+        for chapter in self.get_corpus().data.get('chapters', []):
+            yield project_fields(chapter, fields, exclude)
+
+    def get_search_index(self) -> SearchIndex:
+        """
+        获取本经典的全文检索索引（每次加载语料只建立一次，并发请求共享同一次构建）
+
+        Returns:
+            SearchIndex 实例
+        """
+        corpus = self.get_corpus()
+        return corpus.get_derived('search_index', lambda: SearchIndex(corpus.data.get('chapters', [])))
+
+    def search_chapters(self, query: str, limit: Optional[int] = None) -> List[Dict]:
+        """
+        搜索章节（原文、现代译文、历代注释及英文译文）
 
         Args:
             query: 搜索关键词
+            limit: 最多返回的结果数
 
         Returns:
-            匹配的章节列表
+            按相关度排序的章节列表，含命中字段、位置及摘要窗口
         """
         if not query:
             return []
+        return self.get_search_index().search(query, limit)
 
-        data = self.load_data()
-        results = []
-        query_lower = query.lower()
-
-        for chapter in data['chapters']:
-            # 在原文中搜索
-            if query_lower in chapter.get('original', '').lower():
-                results.append({
-                    'id': chapter['chapter'],
-                    'title': chapter.get('title', f'第{chapter["chapter"]}章'),
-                    'excerpt': chapter.get('original', '')[:100] + '...'
-                })
-            # 在现代译文中搜索
-            elif query_lower in chapter.get('modern_chinese', '').lower():
-                results.append({
-                    'id': chapter['chapter'],
-                    'title': chapter.get('title', f'第{chapter["chapter"]}章'),
-                    'excerpt': chapter.get('modern_chinese', '')[:100] + '...'
-                })
-
-        return results
+    def search_chapters_page(self, query: str, page: int = 1, per_page: int = 20) -> Dict:
+        """
+        搜索章节并分页（仅为当前页结果生成摘要）
+
+        Args:
+            query: 搜索关键词
+            page: 页码（从 1 开始）
+            per_page: 每页结果数
+
+        Returns:
+            包含当前页结果、总数及分页信息的字典
+        """
+        index = self.get_search_index()
+        results = index.search(query, snippets=False) if query else []
+        total = len(results)
+        start = (page - 1) * per_page
+        page_results = results[start:start + per_page]
+        index.add_snippets(page_results, query)
+        return {
+            'query': query,
+            'results': page_results,
+            'total': total,
+            'page': page,
+            'per_page': per_page,
+            'pages': (total + per_page - 1) // per_page
+        }
 
     def get_commentators(self) -> List[Dict]:
         """
@@ -327,6 +598,65 @@ class ClassicService:
         }
 
 
+# ============ 跨经典检索 ============
+
+def search_all_classics(
+    query: str,
+    page: int = 1,
+    per_page: int = 20,
+    classic_ids: Optional[List[str]] = None
+) -> Dict:
+    """
+    在所有已注册经典中检索，合并排序并分页
+
+    Args:
+        query: 搜索关键词
+        page: 页码（从 1 开始）
+        per_page: 每页结果数
+        classic_ids: 限定检索的经典ID列表，为 None 时检索 classics.json 中的全部经典
+
+    Returns:
+        包含当前页结果、总数、分页信息及各经典命中数（facets）的字典
+    """
+    if classic_ids is None:
+        classic_ids = [c['id'] for c in get_all_classics()]
+
+    merged = []
+    facets = {}
+    indexes = {}
+    for classic_id in classic_ids:
+        if not validate_classic_id(classic_id):
+            continue
+        service = ClassicService(classic_id)
+        index = service.get_search_index()
+        results = index.search(query, snippets=False) if query else []
+        indexes[classic_id] = index
+        facets[classic_id] = len(results)
+        for result in results:
+            result['classic_id'] = classic_id
+            result['classic_name'] = service.metadata.get('short_name', '')
+        merged.extend(results)
+
+    merged.sort(key=lambda r: (-r['score'], r['classic_id'], r['id']))
+    total = len(merged)
+    start = (page - 1) * per_page
+    page_results = merged[start:start + per_page]
+
+    # 仅为当前页结果生成摘要
+    for result in page_results:
+        indexes[result['classic_id']].add_snippets([result], query)
+
+    return {
+        'query': query,
+        'results': page_results,
+        'total': total,
+        'page': page,
+        'per_page': per_page,
+        'pages': (total + per_page - 1) // per_page,
+        'facets': facets
+    }
+
+
 # ============ 向后兼容的 DataService ============
 
 class DataService(ClassicService):
@@ -381,6 +711,14 @@ class DataService(ClassicService):
         return service.search_chapters(query)
 
 
+def _prepare_reloaded_corpus(corpus: Corpus, previous: Optional[Corpus]):
+    """热加载时在替换前为新语料重建旧语料已有的索引与章节视图"""
+    ClassicService(corpus.classic_id).prepare_corpus(corpus, previous)
+
+
+corpus_store.preparer = _prepare_reloaded_corpus
+
+
 # ============ 函数别名（向后兼容） ============
 
 def load_data():
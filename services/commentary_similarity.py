@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+注释相似度服务 - MinHash / LSH
+为每条（注释家, 章节）注释预计算字符 shingle 的 MinHash 签名，
+以 LSH 分桶索引，亚线性地查找全书范围内相近的注释
+"""
+
+import re
+import zlib
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# shingle 长度（字符数）
+SHINGLE_SIZE = 2
+
+# 出现在超过该比例注释中的 shingle 视为虚词搭配，不参与比较
+MAX_DOC_FREQUENCY = 0.1
+
+# 签名长度（单次哈希分桶的桶数）
+NUM_HASHES = 128
+
+# LSH 分段：BANDS × ROWS 必须等于 NUM_HASHES
+# 候选阈值约为 (1 / BANDS) ** (1 / ROWS) ≈ 0.125
+BANDS = 64
+ROWS = 2
+
+# 未收录注释的占位文本
+MISSING_TEXT = '此版本暂未收录'
+
+# 计算 shingle 前去除的空白与标点
+_STRIP_PATTERN = re.compile(r'[\s，。、；：！？“”‘’（）《》,.;:!?()\'"]+')
+
+# 文档标识：(章节ID, 注释家ID)
+DocKey = Tuple[int, str]
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Set[str]:
+    """
+    生成文本的字符 shingle 集合
+
+    Args:
+        text: 注释文本
+        size: shingle 长度
+
+    Returns:
+        shingle 集合；文本短于 size 时返回整段文本
+    """
+    text = _STRIP_PATTERN.sub('', text)
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def minhash_signature(items: Iterable[str], num_hashes: int = NUM_HASHES) -> Tuple[int, ...]:
+    """
+    计算 MinHash 签名
+    采用单次哈希分桶（one permutation hashing），空桶借用右侧最近的非空桶补齐
+
+    Args:
+        items: shingle 集合
+        num_hashes: 签名长度
+
+    Returns:
+        长度为 num_hashes 的签名；items 为空时返回空元组
+    """
+    bins: List[Optional[int]] = [None] * num_hashes
+    for item in items:
+        value = zlib.crc32(item.encode('utf-8'))
+        index = value % num_hashes
+        value //= num_hashes
+        if bins[index] is None or value < bins[index]:
+            bins[index] = value
+
+    if all(value is None for value in bins):
+        return ()
+
+    # 借用的值附带距离偏移，避免与原桶值混淆
+    signature = []
+    for i in range(num_hashes):
+        offset = 0
+        while bins[(i + offset) % num_hashes] is None:
+            offset += 1
+        signature.append((offset << 32) | bins[(i + offset) % num_hashes])
+    return tuple(signature)
+
+
+def estimate_similarity(sig1: Tuple[int, ...], sig2: Tuple[int, ...]) -> float:
+    """由两个签名估计 Jaccard 相似度"""
+    if not sig1 or not sig2:
+        return 0.0
+    same = sum(1 for a, b in zip(sig1, sig2) if a == b)
+    return same / len(sig1)
+
+
+class CommentarySimilarityIndex:
+    """
+    注释相似度索引
+    覆盖语料中所有 *_note 字段，按 LSH 分段分桶
+    """
+
+    def __init__(self, chapters: Iterable[Dict]):
+        """
+        Args:
+            chapters: 章节数据列表
+        """
+        self.signatures: Dict[DocKey, Tuple[int, ...]] = {}
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[DocKey]] = defaultdict(list)
+
+        documents: Dict[DocKey, Set[str]] = {}
+        for chapter in chapters:
+            for field, text in chapter.items():
+                if not field.endswith('_note') or not isinstance(text, str):
+                    continue
+                if not text or text == MISSING_TEXT:
+                    continue
+                documents[(chapter['chapter'], field[:-len('_note')])] = shingles(text)
+
+        # 只保留有区分度的 shingle：至少两条注释共有，且不是处处可见的常用搭配
+        frequency = Counter(item for items in documents.values() for item in items)
+        max_frequency = max(2, int(len(documents) * MAX_DOC_FREQUENCY))
+
+        for key, items in documents.items():
+            items = {item for item in items if 1 < frequency[item] <= max_frequency}
+            signature = minhash_signature(items)
+            if not signature:
+                continue
+            self.signatures[key] = signature
+            for band in range(BANDS):
+                band_key = (band, signature[band * ROWS:(band + 1) * ROWS])
+                self._buckets[band_key].append(key)
+
+        self._buckets = dict(self._buckets)
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def candidates(self, key: DocKey) -> Set[DocKey]:
+        """与指定注释至少落入同一 LSH 桶的注释"""
+        signature = self.signatures.get(key)
+        if signature is None:
+            return set()
+        found = set()
+        for band in range(BANDS):
+            found.update(self._buckets.get((band, signature[band * ROWS:(band + 1) * ROWS]), ()))
+        found.discard(key)
+        return found
+
+    def similar(self, chapter_id: int, commentator: str, limit: int = 10,
+                min_similarity: float = 0.0) -> List[Dict]:
+        """
+        查找与指定注释相近的注释（全书范围）
+
+        Args:
+            chapter_id: 章节编号
+            commentator: 注释家ID（如 'wangbi'）
+            limit: 最多返回的结果数
+            min_similarity: 最低估计相似度
+
+        Returns:
+            按估计相似度降序排列的 [{'chapter', 'commentator', 'similarity'}]
+        """
+        key = (chapter_id, commentator)
+        signature = self.signatures.get(key)
+        if signature is None:
+            return []
+
+        results = []
+        for other in self.candidates(key):
+            similarity = estimate_similarity(signature, self.signatures[other])
+            if similarity >= min_similarity:
+                results.append({
+                    'chapter': other[0],
+                    'commentator': other[1],
+                    'similarity': round(similarity, 3)
+                })
+
+        results.sort(key=lambda r: (-r['similarity'], r['chapter'], r['commentator']))
+        return results[:limit]
+
+
+def get_similarity_index(corpus) -> CommentarySimilarityIndex:
+    """
+    获取语料的注释相似度索引（每次加载语料只构建一次，并发请求共享同一次构建）
+
+    Args:
+        corpus: 共享语料
+
+    Returns:
+        CommentarySimilarityIndex 实例
+    """
+    return corpus.get_derived(
+        'commentary_similarity',
+        lambda: CommentarySimilarityIndex(corpus.data.get('chapters', []))
+    )
+
+
+def find_similar_commentaries(chapter_id: int, commentator: str, limit: int = 10,
+                              classic_id: str = 'ddj') -> Dict:
+    """
+    查找全书范围内与指定注释相近的注释（API入口）
+
+    Args:
+        chapter_id: 章节编号
+        commentator: 注释家ID
+        limit: 最多返回的结果数
+        classic_id: 经典ID
+
+    Returns:
+        包含查询注释与相近注释列表的字典
+    """
+    from services.classic_service import ClassicService
+    from services.knowledge_graph import CommentryAnalyzer
+
+    index = get_similarity_index(ClassicService(classic_id).get_corpus())
+    profiles = CommentryAnalyzer.COMMENTATOR_PROFILES
+
+    similar = index.similar(chapter_id, commentator, limit)
+    for item in similar:
+        item['commentator_name'] = profiles.get(item['commentator'], {}).get('name', item['commentator'])
+
+    return {
+        'chapter': chapter_id,
+        'commentator': commentator,
+        'commentator_name': profiles.get(commentator, {}).get('name', commentator),
+        'indexed': (chapter_id, commentator) in index.signatures,
+        'similar': similar
+    }
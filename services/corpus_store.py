@@ -0,0 +1,340 @@
+# -*- coding: utf-8 -*-
+"""
+语料库存储 - 进程级共享的经典数据
+每部经典在每个进程中只解析一次，按经典ID缓存，
+供 ClassicService 及知识图谱、语义考古、虚拟注释家等分析服务共享
+
+数据文件变化时在后台线程重新加载并建立索引，完成后以一次引用赋值替换旧语料，
+进行中的请求始终使用完整的旧语料或新语料，无需重启 worker
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from services.binary_corpus import artifact_path, open_binary_corpus
+from utils.http_cache import file_digest
+from utils.single_flight import SingleFlight
+
+# 数据文件检查间隔（秒），0 表示不检查（不热加载）
+CHECK_INTERVAL = 2.0
+
+
+class Corpus:
+    """
+    单部经典的已解析语料
+    加载时一次性建立 章节ID→章节记录 索引和前后章节表，查询为 O(1)
+    """
+
+    def __init__(self, classic_id: Optional[str], data: Dict, binary=None, version: str = ''):
+        """
+        Args:
+            classic_id: 经典ID（从文件路径直接加载时可为 None）
+            data: 已解析的经典数据（含 title 与 chapters）
+            binary: 数据来源的二进制语料（BinaryCorpus），从 JSON 加载时为 None
+            version: 数据文件的内容哈希（由 CorpusStore 加载时记录）
+        """
+        self.classic_id = classic_id
+        self.data = data
+        self.binary = binary
+        self.version = version
+
+        chapters: List[Dict] = data.get('chapters', [])
+        self.chapter_index: Dict[int, Dict] = {c['chapter']: c for c in chapters}
+        self.neighbours: Dict[int, Tuple[Optional[int], Optional[int]]] = {}
+        for idx, chapter in enumerate(chapters):
+            prev_id = chapters[idx - 1]['chapter'] if idx > 0 else None
+            next_id = chapters[idx + 1]['chapter'] if idx < len(chapters) - 1 else None
+            self.neighbours[chapter['chapter']] = (prev_id, next_id)
+
+        # 章节视图缓存 {章节ID: (词典版本, 视图)}（由 ClassicService 生成）
+        self.chapter_views: Dict[int, Tuple[int, object]] = {}
+        # 派生数据（检索索引、知识图谱等），随语料一起失效
+        self.derived: Dict[str, object] = {}
+        # 合并对同一派生数据的并发构建
+        self.flight = SingleFlight()
+
+    @property
+    def search_index(self):
+        """全文检索索引（首次检索时由 ClassicService 建立）"""
+        return self.derived.get('search_index')
+
+    @search_index.setter
+    def search_index(self, index):
+        self.derived['search_index'] = index
+
+    def get_derived(self, name: str, build: Callable[[], object]):
+        """
+        获取派生数据，未构建时构建一次
+        并发的首次访问只有一个线程执行 build，其余线程等待同一结果
+
+        Args:
+            name: 派生数据名称
+            build: 构建函数
+
+        Returns:
+            派生数据
+        """
+        value = self.derived.get(name)
+        if value is not None:
+            return value
+        return self.flight.do(name, lambda: self._build_derived(name, build))
+
+    def _build_derived(self, name: str, build: Callable[[], object]):
+        """构建并缓存派生数据（由单飞加载的首个调用方执行）"""
+        value = self.derived.get(name)
+        if value is None:
+            value = self.derived[name] = build()
+        return value
+
+    @property
+    def chapter_count(self) -> int:
+        """章节总数"""
+        return len(self.chapter_index)
+
+    def get_chapter(self, chapter_id: int) -> Optional[Dict]:
+        """
+        按章节编号获取章节记录
+
+        Args:
+            chapter_id: 章节编号
+
+        Returns:
+            章节数据字典，如果不存在则返回 None
+        """
+        return self.chapter_index.get(chapter_id)
+
+    def get_neighbours(self, chapter_id: int) -> Tuple[Optional[Dict], Optional[Dict]]:
+        """
+        获取相邻章节记录
+
+        Args:
+            chapter_id: 章节编号
+
+        Returns:
+            (上一章, 下一章)，不存在的一侧为 None
+        """
+        prev_id, next_id = self.neighbours.get(chapter_id, (None, None))
+        return self.chapter_index.get(prev_id), self.chapter_index.get(next_id)
+
+
+class CorpusStore:
+    """
+    进程级语料库缓存
+    按经典ID缓存已解析的语料，同一经典只解析一次；
+    按检查间隔比较数据文件的修改时间与大小，变化时在后台重新加载并原子替换；
+    并发的缓存未命中合并为一次加载，其余线程等待同一结果
+    """
+
+    def __init__(self, check_interval: float = CHECK_INTERVAL):
+        """
+        Args:
+            check_interval: 数据文件检查间隔（秒），0 表示不热加载
+        """
+        self.check_interval = check_interval
+        # 新语料建立后、替换前的准备步骤（新语料, 被替换的语料），用于重建检索索引与章节视图等
+        self.preparer: Optional[Callable[[Corpus, Optional[Corpus]], None]] = None
+        self._corpora: Dict[str, Corpus] = {}
+        # 各经典的数据文件及最近一次加载时的 (修改时间, 大小)
+        self._sources: Dict[str, Tuple[Path, Optional[Tuple[int, int]]]] = {}
+        self._last_checked: Dict[str, float] = {}
+        self._reloading: Dict[str, threading.Thread] = {}
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+
+    def get(self, classic_id: str, data_file: Union[str, Path]) -> Optional[Corpus]:
+        """
+        获取经典语料（带缓存）
+
+        Args:
+            classic_id: 经典ID
+            data_file: 数据文件路径（仅在首次加载时读取）
+
+        Returns:
+            Corpus 实例；文件不存在或格式错误时返回 None（不缓存）
+        """
+        corpus = self._corpora.get(classic_id)
+        if corpus is not None:
+            self._check_source(classic_id)
+            return corpus
+
+        return self._flight.do(classic_id, lambda: self._load_missing(classic_id, data_file))
+
+    def _load_missing(self, classic_id: str, data_file: Union[str, Path]) -> Optional[Corpus]:
+        """缓存未命中时加载并缓存（由单飞加载的首个调用方执行）"""
+        # 上一轮加载可能在本线程检查缓存之后刚刚完成
+        corpus = self._corpora.get(classic_id)
+        if corpus is not None:
+            return corpus
+
+        corpus = self._load(classic_id, data_file)
+        if corpus is not None:
+            self._corpora[classic_id] = corpus
+        return corpus
+
+    def _load(self, classic_id: str, data_file: Union[str, Path]) -> Optional[Corpus]:
+        """读取数据文件并建立语料（不缓存）"""
+        data_file = Path(data_file)
+        signature = _get_signature(data_file)
+
+        # 优先使用未过期的二进制语料：章节为按需解码的只读记录，不解析 JSON
+        binary = open_binary_corpus(data_file)
+        data = binary.to_lazy_data() if binary is not None else read_corpus_file(data_file)
+        if data is None:
+            return None
+
+        # 二进制语料已按源文件校验，其记录的哈希即数据版本，无需再读一遍 JSON
+        version = binary.source_digest if binary is not None else file_digest(data_file)
+        self._sources[classic_id] = (data_file, signature)
+        return Corpus(classic_id, data, binary, version)
+
+    def _check_source(self, classic_id: str):
+        """按检查间隔比较数据文件签名，变化时启动后台重新加载"""
+        if self.check_interval <= 0 or classic_id not in self._sources:
+            return
+        now = time.monotonic()
+        if now - self._last_checked.get(classic_id, 0.0) < self.check_interval:
+            return
+        self._last_checked[classic_id] = now
+
+        data_file, signature = self._sources[classic_id]
+        if _get_signature(data_file) == signature:
+            return
+        with self._lock:
+            if classic_id in self._reloading:
+                return
+            thread = threading.Thread(
+                target=self.reload, args=(classic_id,), name=f'corpus-reload-{classic_id}', daemon=True
+            )
+            self._reloading[classic_id] = thread
+        thread.start()
+
+    def reload(self, classic_id: str) -> Optional[Corpus]:
+        """
+        重新加载经典语料并原子替换
+        新语料在替换前完成解析与准备步骤；内容哈希未变（仅修改时间变化）时保留原语料
+
+        Args:
+            classic_id: 经典ID
+
+        Returns:
+            当前生效的 Corpus 实例；未加载过或新文件无法解析时返回原语料（可能为 None）
+        """
+        try:
+            current = self._corpora.get(classic_id)
+            source = self._sources.get(classic_id)
+            if source is None:
+                return current
+            data_file = source[0]
+
+            if current is not None and file_digest(data_file) == current.version:
+                self._sources[classic_id] = (data_file, _get_signature(data_file))
+                return current
+
+            corpus = self._load(classic_id, data_file)
+            if corpus is None:
+                # 文件写入未完成或格式错误：继续使用旧语料，下次检查时重试
+                self._sources[classic_id] = source
+                return current
+            if self.preparer is not None:
+                self.preparer(corpus, current)
+            # 单次引用赋值，读取方要么得到旧语料要么得到完整的新语料
+            self._corpora[classic_id] = corpus
+            return corpus
+        finally:
+            with self._lock:
+                self._reloading.pop(classic_id, None)
+
+    def wait_for_reloads(self, timeout: Optional[float] = None):
+        """
+        等待进行中的后台重新加载完成
+
+        Args:
+            timeout: 每个线程的最长等待时间（秒）
+        """
+        with self._lock:
+            threads = list(self._reloading.values())
+        for thread in threads:
+            thread.join(timeout)
+
+    def get_version(self, classic_id: str, data_file: Union[str, Path]) -> str:
+        """
+        获取经典数据的版本：已加载时为生效语料的版本，否则为数据文件的内容哈希
+        后台重新加载期间仍返回旧版本，ETag 与页面缓存不会把旧内容记在新版本下
+
+        Args:
+            classic_id: 经典ID
+            data_file: 数据文件路径
+
+        Returns:
+            十六进制哈希
+        """
+        corpus = self._corpora.get(classic_id)
+        if corpus is not None:
+            self._check_source(classic_id)
+            return corpus.version
+        return file_digest(data_file)
+
+    def invalidate(self, classic_id: str):
+        """清除指定经典的语料缓存"""
+        self._corpora.pop(classic_id, None)
+        self._sources.pop(classic_id, None)
+
+    def clear(self):
+        """清除所有语料缓存"""
+        self._corpora.clear()
+        self._sources.clear()
+
+
+def _get_signature(path: Path) -> Optional[Tuple[int, int]]:
+    """
+    数据文件（或其二进制语料）的 (修改时间, 大小)
+
+    Args:
+        path: 数据文件路径
+
+    Returns:
+        文件签名；数据文件与二进制语料均不存在时返回 None
+    """
+    for candidate in (path, artifact_path(path)):
+        try:
+            stat = os.stat(candidate)
+        except OSError:
+            continue
+        return stat.st_mtime_ns, stat.st_size
+    return None
+
+
+def read_corpus_file(data_file: Union[str, Path]) -> Optional[Dict]:
+    """
+    读取并解析经典数据文件
+
+    Args:
+        data_file: 数据文件路径
+
+    Returns:
+        解析后的数据字典；文件不存在或格式错误时返回 None
+    """
+    try:
+        with open(data_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except json.JSONDecodeError:
+        return None
+
+
+# 全局语料库实例
+corpus_store = CorpusStore()
+
+
+def init_corpus_store(app):
+    """
+    按应用配置设置数据文件检查间隔
+
+    Args:
+        app: Flask 应用实例
+    """
+    corpus_store.check_interval = app.config.get('CORPUS_RELOAD_INTERVAL', CHECK_INTERVAL)
@@ -3,10 +3,8 @@
 数据服务 - 加载和处理道德经数据
 """
 
-import json
 from typing import Dict, List, Optional, Tuple
-from config import DATA_FILE
-from services.annotation_service import annotate_difficult_chars
+from services.classic_service import ClassicService
 
 
 class DataService:
@@ -17,27 +15,18 @@ class DataService:
     @classmethod
     def load_data(cls) -> Dict:
         """
-        加载道德经数据（带缓存）
+        加载道德经数据（与 ClassicService 共享同一份语料缓存）
 
         Returns:
             包含所有章节数据的字典
         """
-        if cls._data_cache is not None:
-            return cls._data_cache
-
-        try:
-            with open(DATA_FILE, 'r', encoding='utf-8') as f:
-                cls._data_cache = json.load(f)
-            return cls._data_cache
-        except FileNotFoundError:
-            return {"title": "道德经", "chapters": []}
-        except json.JSONDecodeError:
-            return {"title": "道德经", "chapters": []}
+        return ClassicService("ddj").load_data()
 
     @classmethod
     def clear_cache(cls):
         """清除数据缓存"""
         cls._data_cache = None
+        ClassicService("ddj").clear_cache()
 
     @classmethod
     def get_chapter(cls, chapter_id: int) -> Optional[Dict]:
@@ -50,12 +39,7 @@ class DataService:
         Returns:
             章节数据字典，如果不存在则返回 None
         """
-        data = cls.load_data()
-        chapter = next(
-            (c for c in data['chapters'] if c['chapter'] == chapter_id),
-            None
-        )
-        return chapter
+        return ClassicService("ddj").get_chapter(chapter_id)
 
     @classmethod
     def get_chapter_with_annotation(cls, chapter_id: int) -> Optional[Dict]:
@@ -68,25 +52,7 @@ class DataService:
         Returns:
             包含标注内容和相邻章节信息的字典，如果不存在则返回 None
         """
-        data = cls.load_data()
-        chapter = next(
-            (c for c in data['chapters'] if c['chapter'] == chapter_id),
-            None
-        )
-
-        if chapter:
-            # 为原文添加疑难字标注
-            chapter['original_annotated'] = annotate_difficult_chars(
-                chapter.get('original', '')
-            )
-
-            # 获取相邻章节
-            idx = data['chapters'].index(chapter)
-            chapter['prev_chapter'] = data['chapters'][idx - 1] if idx > 0 else None
-            chapter['next_chapter'] = data['chapters'][idx + 1] if idx < len(data['chapters']) - 1 else None
-            chapter['total_chapters'] = len(data['chapters'])
-
-        return chapter
+        return ClassicService("ddj").get_chapter_with_annotation(chapter_id)
 
     @classmethod
     def get_all_chapters(cls) -> List[Dict]:
@@ -110,30 +76,7 @@ class DataService:
         Returns:
             匹配的章节列表
         """
-        if not query:
-            return []
-
-        data = cls.load_data()
-        results = []
-        query_lower = query.lower()
-
-        for chapter in data['chapters']:
-            # 在原文中搜索
-            if query_lower in chapter.get('original', '').lower():
-                results.append({
-                    'id': chapter['chapter'],
-                    'title': f'第{chapter["chapter"]}章',
-                    'excerpt': chapter.get('original', '')[:100] + '...'
-                })
-            # 在现代译文中搜索
-            elif query_lower in chapter.get('modern_chinese', '').lower():
-                results.append({
-                    'id': chapter['chapter'],
-                    'title': f'第{chapter["chapter"]}章',
-                    'excerpt': chapter.get('modern_chinese', '')[:100] + '...'
-                })
-
-        return results
+        return ClassicService("ddj").search_chapters(query)
 
 
 # 向后兼容的函数别名
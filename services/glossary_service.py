@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+词典服务 - 各经典独立的疑难字词典
+词典在 classics.json 中按经典声明，每部经典的词典只编译一次，
+并缓存各章节的标注结果；词典或数据文件修改时间变化时自动失效
+"""
+
+import os
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+from services.annotation_service import DifficultCharAnnotator, load_glossary
+from utils.http_cache import file_digest
+
+# 文件修改时间检查间隔（秒）
+CHECK_INTERVAL = 1.0
+
+# 各经典词典缓存
+_glossary_caches: Dict[str, 'GlossaryCache'] = {}
+
+
+def _get_mtime(path: Optional[Union[str, Path]]) -> Optional[float]:
+    """获取文件修改时间，文件不存在时返回 None"""
+    if path is None:
+        return None
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+class GlossaryCache:
+    """
+    单部经典的已编译词典与章节标注缓存
+    """
+
+    def __init__(
+        self,
+        glossary_file: Optional[Union[str, Path]],
+        data_file: Optional[Union[str, Path]] = None,
+        check_interval: float = CHECK_INTERVAL
+    ):
+        """
+        Args:
+            glossary_file: 词典文件路径，为 None 时不做标注
+            data_file: 经典数据文件路径（用于判断标注缓存是否失效）
+            check_interval: 文件修改时间检查间隔（秒）
+        """
+        self.glossary_file = glossary_file
+        self.data_file = data_file
+        self.check_interval = check_interval
+        # 缓存版本号，词典或数据变化时递增
+        self.version = 0
+        # 当前已编译词典的内容哈希（计入页面 ETag，与实际使用的词典一致）
+        self.digest = ''
+
+        self.annotator = DifficultCharAnnotator({})
+        # {章节编号: (原文, 标注结果)}，原文不同（如热加载前后的语料）时重新标注
+        self._annotated: Dict[int, Tuple[str, str]] = {}
+        self._glossary_mtime: Optional[float] = None
+        self._data_mtime: Optional[float] = None
+        self._last_checked: Optional[float] = None
+
+    def refresh(self, force: bool = False):
+        """
+        检查词典与数据文件是否变化，变化时重新编译词典并清空标注缓存
+
+        Args:
+            force: 忽略检查间隔立即检查
+        """
+        now = time.monotonic()
+        if not force and self._last_checked is not None \
+                and now - self._last_checked < self.check_interval:
+            return
+        self._last_checked = now
+
+        glossary_mtime = _get_mtime(self.glossary_file)
+        data_mtime = _get_mtime(self.data_file)
+
+        if self.version and glossary_mtime == self._glossary_mtime \
+                and data_mtime == self._data_mtime:
+            return
+
+        if not self.version or glossary_mtime != self._glossary_mtime:
+            # 先取哈希再读取：读取期间文件再次变化时，下次检查会再次重新编译
+            self.digest = file_digest(self.glossary_file)
+            glossary = load_glossary(self.glossary_file) if self.glossary_file else {}
+            self.annotator = DifficultCharAnnotator(glossary)
+
+        self._glossary_mtime = glossary_mtime
+        self._data_mtime = data_mtime
+        self._annotated = {}
+        self.version += 1
+
+    def annotate(self, text: str) -> str:
+        """
+        使用本经典词典标注文本（不缓存）
+
+        Args:
+            text: 原始文本
+
+        Returns:
+            带标注的 HTML 文本
+        """
+        self.refresh()
+        return self.annotator.annotate(text)
+
+    def annotate_chapter(self, chapter_id: int, text: str) -> str:
+        """
+        标注章节原文（按章节缓存，缓存项同时记录原文，原文变化时不会返回旧标注）
+
+        Args:
+            chapter_id: 章节编号
+            text: 章节原文
+
+        Returns:
+            带标注的 HTML 文本
+        """
+        self.refresh()
+        cached = self._annotated.get(chapter_id)
+        if cached is not None and cached[0] == text:
+            return cached[1]
+        annotated = self.annotator.annotate(text)
+        self._annotated[chapter_id] = (text, annotated)
+        return annotated
+
+
+def get_glossary_cache(
+    classic_id: str,
+    glossary_file: Optional[Union[str, Path]],
+    data_file: Optional[Union[str, Path]] = None
+) -> GlossaryCache:
+    """
+    获取经典的词典缓存（每部经典一个实例）
+
+    Args:
+        classic_id: 经典ID
+        glossary_file: 词典文件路径
+        data_file: 经典数据文件路径
+
+    Returns:
+        GlossaryCache 实例
+    """
+    cache = _glossary_caches.get(classic_id)
+    if cache is None:
+        cache = _glossary_caches.setdefault(
+            classic_id, GlossaryCache(glossary_file, data_file)
+        )
+    return cache
+
+
+def clear_glossary_caches():
+    """清除所有词典缓存"""
+    _glossary_caches.clear()
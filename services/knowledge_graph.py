@@ -6,9 +6,12 @@
 
 import json
 import re
-from typing import Dict, List, Set, Tuple, Optional
+from typing import Dict, Iterator, List, Set, Tuple, Optional
 from collections import defaultdict, Counter
+from itertools import combinations
 import os
+from services.corpus_store import Corpus
+from services.pattern_matcher import AhoCorasick
 
 
 class ConceptExtractor:
@@ -33,33 +36,44 @@ class ConceptExtractor:
         '否定对比',    # 绝圣弃智
     ]
 
+    # 单字概念
+    SINGLE_CONCEPTS = '道德无为有朴虚静自然治身观守抱持养'
+
+    # 双字概念
+    DOUBLE_CONCEPTS = [
+        '无为', '自然', '虚静', '守中', '抱一', '归根',
+        '复命', '玄同', '玄牝', '谷神', '朴器',
+        '圣人', '百姓', '天地', '万物', '天下',
+        '上善', '若水', '不争', '柔弱', '知足',
+        '清静', '无为', '无事', '无味', '无欲',
+        '绝圣', '弃智', '见素', '抱朴', '少私',
+        '寡欲', '玄德', '微妙', '玄通', '玄览'
+    ]
+
+    # 句子切分标点（句级共现窗口使用）
+    SENTENCE_PATTERN = re.compile('[。！？；]')
+
+    # 概念词典编译后的匹配器（所有实例共享）
+    _matcher: Optional[AhoCorasick] = None
+
     def __init__(self):
         self.concept_chapters = defaultdict(set)  # 概念出现的章节
         self.concept_cooccurrence = defaultdict(Counter)  # 概念共现
 
+    @classmethod
+    def _get_matcher(cls) -> AhoCorasick:
+        """获取概念匹配器（首次使用时编译）"""
+        if cls._matcher is None:
+            cls._matcher = AhoCorasick(list(cls.SINGLE_CONCEPTS) + cls.DOUBLE_CONCEPTS)
+        return cls._matcher
+
+    def match_concepts(self, text: str) -> Set[str]:
+        """一次扫描匹配文本中出现的全部概念（不记录章节关联）"""
+        return {pattern for _, _, pattern in self._get_matcher().iter_matches(text)}
+
     def extract_from_chapter(self, chapter_id: int, text: str) -> Set[str]:
         """从章节中提取概念"""
-        concepts = set()
-
-        # 提取单字概念
-        for char in text:
-            if char in '道德无为有朴虚静自然治身观守抱持养':
-                concepts.add(char)
-
-        # 提取双字概念
-        double_concepts = [
-            '无为', '自然', '虚静', '守中', '抱一', '归根',
-            '复命', '玄同', '玄牝', '谷神', '朴器',
-            '圣人', '百姓', '天地', '万物', '天下',
-            '上善', '若水', '不争', '柔弱', '知足',
-            '清静', '无为', '无事', '无味', '无欲',
-            '绝圣', '弃智', '见素', '抱朴', '少私',
-            '寡欲', '玄德', '微妙', '玄通', '玄览'
-        ]
-
-        for concept in double_concepts:
-            if concept in text:
-                concepts.add(concept)
+        concepts = self.match_concepts(text)
 
         # 记录章节关联
         for concept in concepts:
@@ -67,24 +81,73 @@ class ConceptExtractor:
 
         return concepts
 
-    def build_cooccurrence_network(self, chapters_data: List[Dict]) -> Dict:
-        """构建概念共现网络"""
-        for chapter in chapters_data:
-            concepts = self.extract_from_chapter(
-                chapter['chapter'],
-                chapter.get('original', '') + chapter.get('modern_chinese', '')
-            )
+    def build_cooccurrence_network(self, chapters_data: List[Dict], window: Optional[int] = None) -> Dict:
+        """
+        构建概念共现网络
 
-            # 记录共现关系
-            concept_list = list(concepts)
-            for i, c1 in enumerate(concept_list):
-                for c2 in concept_list[i+1:]:
-                    self.concept_cooccurrence[c1][c2] += 1
-                    self.concept_cooccurrence[c2][c1] += 1
+        Args:
+            chapters_data: 章节数据列表
+            window: 句级共现窗口（连续句子数）；为 None 时以整章为共现单位
+
+        Returns:
+            {概念: Counter({共现概念: 次数})}
+        """
+        incidence = ConceptIncidence()
+        for chapter in chapters_data:
+            text = chapter.get('original', '') + chapter.get('modern_chinese', '')
+            concepts = self.extract_from_chapter(chapter['chapter'], text)
+            if window is None:
+                incidence.add_unit(concepts)
+            else:
+                sentences = [
+                    self.match_concepts(sentence)
+                    for sentence in self.SENTENCE_PATTERN.split(text) if sentence.strip()
+                ]
+                for start in range(max(len(sentences) - window + 1, 1)):
+                    incidence.add_unit(set().union(*sentences[start:start + window]))
+
+        for c1, related in incidence.cooccurrence().items():
+            self.concept_cooccurrence[c1].update(related)
 
         return dict(self.concept_cooccurrence)
 
 
+class ConceptIncidence:
+    """
+    共现单位×概念 稀疏关联矩阵 A
+    按行（共现单位：章节或句窗）保存其包含的概念，共现矩阵为 AᵀA：
+    逐单位累加其中概念两两组合的计数，耗时与各单位内概念数的平方和成正比，
+    与概念总数无关（不比较从未同时出现的概念对）
+    """
+
+    def __init__(self):
+        self.unit_count = 0
+        # 各单位包含的概念（排序后保存，便于生成有序的概念对）
+        self._units: List[Tuple[str, ...]] = []
+
+    def add_unit(self, concepts: Set[str]):
+        """添加一个共现单位（章节或句窗）及其包含的概念"""
+        self._units.append(tuple(sorted(concepts)))
+        self.unit_count += 1
+
+    def cooccurrence(self) -> Dict[str, Counter]:
+        """
+        计算概念共现矩阵 AᵀA 的非对角元素
+
+        Returns:
+            {概念: Counter({共现概念: 共同出现的单位数})}，只包含非零项
+        """
+        pairs: Counter = Counter()
+        for concepts in self._units:
+            pairs.update(combinations(concepts, 2))
+
+        result: Dict[str, Counter] = defaultdict(Counter)
+        for (c1, c2), weight in pairs.items():
+            result[c1][c2] = weight
+            result[c2][c1] = weight
+        return dict(result)
+
+
 class CommentryAnalyzer:
     """注释分析器 - 分析历代注释的观点"""
 
@@ -286,20 +349,28 @@ class CommentryAnalyzer:
 class KnowledgeGraphBuilder:
     """知识图谱构建器"""
 
-    def __init__(self, data_file: str):
+    def __init__(self, data_file: str, corpus: Optional[Corpus] = None):
         self.data_file = data_file
+        self.corpus = corpus
         self.data = None
         self.concept_extractor = ConceptExtractor()
         self.commentary_analyzer = CommentryAnalyzer()
 
     def load_data(self):
-        """加载数据"""
+        """加载数据（提供共享语料时直接使用，不再重复解析）"""
+        if self.corpus is not None:
+            self.data = self.corpus.data
+            return self.data
         try:
             with open(self.data_file, 'r', encoding='utf-8') as f:
                 self.data = json.load(f)
+            self.corpus = Corpus(None, self.data)
             return self.data
         except FileNotFoundError:
-            return {"title": "道德经", "chapters": []}
+            # 数据文件缺失时使用空语料，后续查询返回空结果
+            self.data = {"title": "道德经", "chapters": []}
+            self.corpus = Corpus(None, self.data)
+            return self.data
 
     def build_concept_graph(self) -> Dict:
         """构建概念图谱"""
@@ -311,23 +382,26 @@ class KnowledgeGraphBuilder:
         concept_map = {}
 
         # 处理所有章节
+        incidence = ConceptIncidence()
         for chapter in self.data['chapters']:
             text = chapter.get('original', '')
             concepts = self.concept_extractor.extract_from_chapter(
                 chapter['chapter'], text
             )
+            incidence.add_unit(concepts)
+
+        for c1, related in incidence.cooccurrence().items():
+            self.concept_extractor.concept_cooccurrence[c1].update(related)
 
-            for concept in concepts:
-                if concept not in concept_map:
-                    # 确定概念层级
-                    level = self._get_concept_level(concept)
-                    concept_map[concept] = {
-                        'id': concept,
-                        'label': concept,
-                        'level': level,
-                        'chapters': list(self.concept_extractor.concept_chapters[concept]),
-                        'count': len(self.concept_extractor.concept_chapters[concept])
-                    }
+        # 所有章节处理完毕后再汇总，保证章节列表完整
+        for concept, chapter_ids in self.concept_extractor.concept_chapters.items():
+            concept_map[concept] = {
+                'id': concept,
+                'label': concept,
+                'level': self._get_concept_level(concept),
+                'chapters': sorted(chapter_ids),
+                'count': len(chapter_ids)
+            }
 
         # 构建节点
         for concept_id, info in concept_map.items():
@@ -339,11 +413,11 @@ class KnowledgeGraphBuilder:
                 'chapters': info['chapters']
             })
 
-        # 构建边（基于共现关系）
+        # 构建边（基于共现关系，无向边只输出一次）
         cooccurrence = self.concept_extractor.concept_cooccurrence
         for c1, related in cooccurrence.items():
             for c2, weight in related.items():
-                if weight >= 2:  # 至少共现2次
+                if c1 < c2 and weight >= 2:  # 至少共现2次
                     edges.append({
                         'source': c1,
                         'target': c2,
@@ -385,10 +459,7 @@ class KnowledgeGraphBuilder:
 
     def build_commentary_spectrum(self, chapter_id: int) -> Dict:
         """构建注释观点谱系"""
-        chapter = next(
-            (c for c in self.data['chapters'] if c['chapter'] == chapter_id),
-            None
-        )
+        chapter = self.corpus.get_chapter(chapter_id)
 
         if not chapter:
             return {}
@@ -476,35 +547,158 @@ class KnowledgeGraphBuilder:
         return "，".join(summary_parts)
 
 
-def get_chapter_knowledge_graph(chapter_id: int) -> Dict:
-    """获取章节知识图谱（API入口）"""
-    graph_builder = KnowledgeGraphBuilder('data/daodejing.json')
+class ConceptGraph:
+    """
+    预计算的概念图谱
+    每个数据版本（每次加载语料）只构建一次全局图谱，
+    按章节按需切出以本章概念为中心的子图并缓存
+    """
+
+    def __init__(self, graph: Dict):
+        """
+        Args:
+            graph: build_concept_graph 生成的全局图谱
+        """
+        self.graph = graph
+        self._slices: Dict[int, Dict] = {}
+
+    @classmethod
+    def build(cls, builder: 'KnowledgeGraphBuilder') -> 'ConceptGraph':
+        """基于已加载数据的构建器生成图谱"""
+        return cls(builder.build_concept_graph())
+
+    def full(self) -> Dict:
+        """全局概念图谱"""
+        return self.graph
+
+    def chapter_slice(self, chapter_id: int) -> Dict:
+        """
+        获取章节子图：本章出现的概念及其之间的共现边
+
+        Args:
+            chapter_id: 章节编号
+
+        Returns:
+            与全局图谱结构相同的子图
+        """
+        subgraph = self._slices.get(chapter_id)
+        if subgraph is not None:
+            return subgraph
+
+        nodes = [n for n in self.graph.get('nodes', []) if chapter_id in n['chapters']]
+        node_ids = {n['id'] for n in nodes}
+        edges = [
+            e for e in self.graph.get('edges', [])
+            if e['source'] in node_ids and e['target'] in node_ids
+        ]
+        subgraph = {
+            'nodes': nodes,
+            'edges': edges,
+            'concept_count': len(nodes),
+            'edge_count': len(edges),
+            'chapter': chapter_id,
+            'scope': 'chapter'
+        }
+        return self._slices.setdefault(chapter_id, subgraph)
+
+    def concepts(self) -> List[Dict]:
+        """概念列表（按出现章节数降序）"""
+        concepts = [
+            {
+                'concept': node['id'],
+                'chapter_count': len(node['chapters']),
+                'chapters': sorted(node['chapters'])
+            }
+            for node in self.graph.get('nodes', [])
+        ]
+        return sorted(concepts, key=lambda x: x['chapter_count'], reverse=True)
+
+
+def _get_graph_builder() -> KnowledgeGraphBuilder:
+    """基于共享语料创建道德经知识图谱构建器"""
+    from services.classic_service import ClassicService
+
+    service = ClassicService('ddj')
+    return KnowledgeGraphBuilder(str(service.data_file), corpus=service.get_corpus())
+
+
+def get_concept_graph(corpus: Corpus) -> ConceptGraph:
+    """
+    获取语料的预计算概念图谱（每次加载语料只构建一次，并发请求共享同一次构建）
+
+    Args:
+        corpus: 共享语料
+
+    Returns:
+        ConceptGraph 实例
+    """
+    def build() -> ConceptGraph:
+        builder = KnowledgeGraphBuilder(None, corpus=corpus)
+        builder.load_data()
+        return ConceptGraph.build(builder)
+
+    return corpus.get_derived('concept_graph', build)
+
+
+def get_commentary_spectrum(corpus: Corpus, chapter_id: int) -> Dict:
+    """
+    获取章节注释观点谱系（按章节缓存，随语料一起失效）
+
+    Args:
+        corpus: 共享语料
+        chapter_id: 章节编号
+
+    Returns:
+        build_commentary_spectrum 的结果，章节不存在时为空字典
+    """
+    spectra = corpus.derived.setdefault('commentary_spectra', {})
+    spectrum = spectra.get(chapter_id)
+    if spectrum is None:
+        builder = KnowledgeGraphBuilder(None, corpus=corpus)
+        builder.load_data()
+        spectrum = spectra.setdefault(chapter_id, builder.build_commentary_spectrum(chapter_id))
+    return spectrum
+
+
+def iter_commentary_spectra(chapter_ids: List[int]) -> Iterator[Dict]:
+    """
+    逐章生成注释观点谱系（批量API入口）
+
+    Args:
+        chapter_ids: 章节编号列表
+
+    Yields:
+        各章谱系，章节不存在时跳过
+    """
+    from services.classic_service import ClassicService
+
+    corpus = ClassicService('ddj').get_corpus()
+    for chapter_id in chapter_ids:
+        spectrum = get_commentary_spectrum(corpus, chapter_id)
+        if spectrum:
+            yield spectrum
+
+
+def get_chapter_knowledge_graph(chapter_id: int, full: bool = False) -> Dict:
+    """
+    获取章节知识图谱（API入口）
+
+    Args:
+        chapter_id: 章节编号
+        full: 是否返回全局概念图谱（默认只返回本章子图）
+    """
+    graph_builder = _get_graph_builder()
     graph_builder.load_data()
+    concept_graph = get_concept_graph(graph_builder.corpus)
 
     return {
-        'concept_graph': graph_builder.build_concept_graph(),
-        'commentary_spectrum': graph_builder.build_commentary_spectrum(chapter_id)
+        'concept_graph': concept_graph.full() if full else concept_graph.chapter_slice(chapter_id),
+        'commentary_spectrum': get_commentary_spectrum(graph_builder.corpus, chapter_id)
     }
 
 
 def get_all_concepts() -> List[Dict]:
     """获取所有概念列表"""
-    graph_builder = KnowledgeGraphBuilder('data/daodejing.json')
-    data = graph_builder.load_data()
-
-    concept_extractor = ConceptExtractor()
-    for chapter in data['chapters']:
-        concept_extractor.extract_from_chapter(
-            chapter['chapter'],
-            chapter.get('original', '')
-        )
-
-    concepts = []
-    for concept, chapters in concept_extractor.concept_chapters.items():
-        concepts.append({
-            'concept': concept,
-            'chapter_count': len(chapters),
-            'chapters': sorted(list(chapters))
-        })
-
-    return sorted(concepts, key=lambda x: x['chapter_count'], reverse=True)
+    graph_builder = _get_graph_builder()
+    graph_builder.load_data()
+    return get_concept_graph(graph_builder.corpus).concepts()
@@ -0,0 +1,342 @@
+# -*- coding: utf-8 -*-
+"""
+页面缓存 - 已渲染 HTML 的 LRU 缓存
+页面输出只取决于 (路径, 数据版本, 模板版本)，渲染结果连同预压缩的
+gzip / brotli 版本按字节数上限缓存在进程内，可选落盘供其他进程复用
+"""
+
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from functools import wraps
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple, Union
+from flask import current_app, make_response, request
+from utils.http_cache import get_template_version
+
+try:
+    import brotli
+except ImportError:  # brotli 为可选依赖，未安装时只提供 gzip
+    brotli = None
+
+# 默认内存缓存上限（字节）
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+# 压缩级别
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 9
+
+# 缓存页面随之变化的请求头（200 与 304 响应都携带）
+PAGE_VARY = ('Accept-Encoding',)
+
+# 默认磁盘缓存上限（字节），超出后按最近使用时间删除旧条目至上限的 DISK_LOW_WATER 比例
+DEFAULT_DISK_MAX_BYTES = 256 * 1024 * 1024
+DISK_LOW_WATER = 0.8
+
+# 内容编码 -> 磁盘缓存文件后缀
+ENCODING_SUFFIXES = {
+    'identity': '.html',
+    'gzip': '.html.gz',
+    'br': '.html.br',
+}
+
+
+class CachedPage:
+    """
+    一个已渲染页面及其预压缩版本
+    """
+
+    __slots__ = ('variants', 'size')
+
+    def __init__(self, variants: Dict[str, bytes]):
+        """
+        Args:
+            variants: {内容编码: 响应体}，至少包含 'identity'
+        """
+        self.variants = variants
+        self.size = sum(len(body) for body in variants.values())
+
+    @classmethod
+    def compress(cls, html: bytes) -> 'CachedPage':
+        """
+        由原始 HTML 生成缓存项（附带 gzip 及可用时的 brotli 版本）
+
+        Args:
+            html: UTF-8 编码的 HTML
+
+        Returns:
+            CachedPage 实例
+        """
+        variants = {
+            'identity': html,
+            'gzip': gzip.compress(html, compresslevel=GZIP_LEVEL, mtime=0)
+        }
+        if brotli is not None:
+            variants['br'] = brotli.compress(html, quality=BROTLI_QUALITY)
+        return cls(variants)
+
+    def negotiate(self, accept_encodings) -> Tuple[str, bytes]:
+        """
+        按客户端 Accept-Encoding 选择响应体
+
+        Args:
+            accept_encodings: werkzeug 的 Accept 对象
+
+        Returns:
+            (内容编码, 响应体)
+        """
+        candidates = [e for e in ('br', 'gzip') if e in self.variants] + ['identity']
+        encoding = accept_encodings.best_match(candidates, default='identity')
+        return encoding, self.variants[encoding]
+
+
+class PageCache:
+    """
+    按字节数限制的页面 LRU 缓存，可选磁盘二级缓存
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES,
+                 disk_dir: Optional[Union[str, Path]] = None,
+                 disk_max_bytes: int = DEFAULT_DISK_MAX_BYTES):
+        """
+        Args:
+            max_bytes: 内存缓存上限（所有版本的字节数之和），0 表示不缓存
+            disk_dir: 磁盘缓存目录，为 None 时只用内存
+            disk_max_bytes: 磁盘缓存上限（字节）
+        """
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+        self.size = 0
+        self._entries: 'OrderedDict[tuple, CachedPage]' = OrderedDict()
+        self._lock = threading.Lock()
+        # 磁盘缓存字节数（首次写入时扫描目录得出，其他进程的写入在淘汰时重新统计）
+        self._disk_size: Optional[int] = None
+
+    def configure(self, max_bytes: int, disk_dir: Optional[Union[str, Path]] = None,
+                  disk_max_bytes: int = DEFAULT_DISK_MAX_BYTES):
+        """重新设置容量与磁盘目录（清空内存缓存）"""
+        with self._lock:
+            self.max_bytes = max_bytes
+            self.disk_dir = Path(disk_dir) if disk_dir else None
+            self.disk_max_bytes = disk_max_bytes
+            self._disk_size = None
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _disk_name(key: tuple) -> str:
+        """缓存键对应的磁盘文件名（不含后缀）"""
+        return hashlib.sha256(repr(key).encode('utf-8')).hexdigest()
+
+    def get(self, key: tuple) -> Optional[CachedPage]:
+        """
+        查找缓存页面（内存未命中时尝试磁盘）
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            CachedPage 实例，未命中时返回 None
+        """
+        with self._lock:
+            page = self._entries.get(key)
+            if page is not None:
+                self._entries.move_to_end(key)
+                return page
+
+        page = self._read_disk(key)
+        if page is not None:
+            self._store(key, page)
+        return page
+
+    def put(self, key: tuple, html: bytes) -> CachedPage:
+        """
+        缓存渲染结果
+
+        Args:
+            key: 缓存键
+            html: UTF-8 编码的 HTML
+
+        Returns:
+            新建的 CachedPage
+        """
+        page = CachedPage.compress(html)
+        self._store(key, page)
+        self._write_disk(key, page)
+        return page
+
+    def _store(self, key: tuple, page: CachedPage):
+        """放入内存缓存并按字节数淘汰最久未用的页面"""
+        if page.size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old.size
+            self._entries[key] = page
+            self.size += page.size
+            while self.size > self.max_bytes:
+                _key, evicted = self._entries.popitem(last=False)
+                self.size -= evicted.size
+
+    def _read_disk(self, key: tuple) -> Optional[CachedPage]:
+        """从磁盘缓存读取页面"""
+        if self.disk_dir is None:
+            return None
+        base = self.disk_dir / self._disk_name(key)
+        variants = {}
+        for encoding, suffix in ENCODING_SUFFIXES.items():
+            try:
+                with open(str(base) + suffix, 'rb') as f:
+                    variants[encoding] = f.read()
+            except OSError:
+                continue
+        if 'identity' not in variants:
+            return None
+        # 以修改时间记录最近使用，淘汰时保留常用页面
+        try:
+            os.utime(str(base) + ENCODING_SUFFIXES['identity'])
+        except OSError:
+            pass
+        return CachedPage(variants)
+
+    def _write_disk(self, key: tuple, page: CachedPage):
+        """写入磁盘缓存（先写临时文件再原子替换）"""
+        if self.disk_dir is None:
+            return
+        try:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            base = str(self.disk_dir / self._disk_name(key))
+            # 原始 HTML 最后写入，作为该条目完整可用的标志
+            for encoding in sorted(page.variants, key=lambda e: e == 'identity'):
+                path = base + ENCODING_SUFFIXES[encoding]
+                tmp_path = f'{path}.{os.getpid()}.tmp'
+                with open(tmp_path, 'wb') as f:
+                    f.write(page.variants[encoding])
+                os.replace(tmp_path, path)
+        except OSError:
+            # 磁盘缓存只是加速手段，写入失败不影响响应
+            return
+
+        with self._lock:
+            if self._disk_size is None:
+                self._disk_size = sum(size for _mtime, size, _paths in self._scan_disk().values())
+            else:
+                self._disk_size += page.size
+            over_limit = self._disk_size > self.disk_max_bytes
+        if over_limit:
+            self._prune_disk()
+
+    def _scan_disk(self) -> Dict[str, Tuple[float, int, list]]:
+        """统计磁盘缓存条目 {文件名前缀: (最近使用时间, 字节数, 文件列表)}"""
+        entries: Dict[str, Tuple[float, int, list]] = {}
+        try:
+            paths = list(self.disk_dir.iterdir())
+        except OSError:
+            return entries
+        for path in paths:
+            if not path.name.endswith(tuple(ENCODING_SUFFIXES.values())):
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            name = path.name.split('.', 1)[0]
+            mtime, size, files = entries.get(name, (0.0, 0, []))
+            files.append(path)
+            entries[name] = (max(mtime, stat.st_mtime), size + stat.st_size, files)
+        return entries
+
+    def _prune_disk(self):
+        """按最近使用时间删除磁盘缓存条目（含旧版本页面），直到低于上限的 DISK_LOW_WATER"""
+        entries = self._scan_disk()
+        total = sum(size for _mtime, size, _paths in entries.values())
+        target = self.disk_max_bytes * DISK_LOW_WATER
+        for _mtime, size, paths in sorted(entries.values(), key=lambda entry: entry[0]):
+            if total <= target:
+                break
+            for path in paths:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            total -= size
+        with self._lock:
+            self._disk_size = total
+
+    def clear(self):
+        """清空内存缓存与磁盘缓存"""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+            self._disk_size = None
+        if self.disk_dir is not None and self.disk_dir.is_dir():
+            for path in self.disk_dir.iterdir():
+                if path.name.endswith(tuple(ENCODING_SUFFIXES.values())):
+                    try:
+                        path.unlink()
+                    except OSError:
+                        pass
+
+
+# 全局页面缓存实例
+page_cache = PageCache()
+
+
+def init_page_cache(app):
+    """
+    按应用配置初始化页面缓存
+
+    Args:
+        app: Flask 应用实例
+    """
+    page_cache.configure(
+        app.config.get('PAGE_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES),
+        app.config.get('PAGE_CACHE_DIR'),
+        app.config.get('PAGE_CACHE_DISK_MAX_BYTES', DEFAULT_DISK_MAX_BYTES)
+    )
+
+
+def cached_page(version_func: Callable[..., str]):
+    """
+    页面缓存装饰器：命中时直接返回已渲染（并按需压缩）的 HTML
+
+    Args:
+        version_func: 以视图参数调用，返回页面所依赖数据的版本号
+
+    Usage:
+        @bp.route('/<classic_id>/chapter/<int:chapter_id>')
+        @cached_page(_classic_version)
+        def chapter_view(classic_id, chapter_id):
+            ...
+    """
+    def decorator(f: Callable) -> Callable:
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or page_cache.max_bytes <= 0:
+                return f(*args, **kwargs)
+
+            key = (request.path, version_func(*args, **kwargs), get_template_version())
+            page = page_cache.get(key)
+            if page is None:
+                response = make_response(f(*args, **kwargs))
+                # 只缓存正常渲染的页面（重定向等直接返回）
+                if response.status_code != 200 or response.mimetype != 'text/html':
+                    return response
+                page = page_cache.put(key, response.get_data())
+
+            encoding, body = page.negotiate(request.accept_encodings)
+            response = current_app.response_class(body, mimetype='text/html')
+            if encoding != 'identity':
+                response.headers['Content-Encoding'] = encoding
+            for header in PAGE_VARY:
+                response.vary.add(header)
+            return response
+        return wrapper
+    return decorator
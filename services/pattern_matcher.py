@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+多模式匹配 - Aho-Corasick 自动机
+一次编译词典，对文本做线性扫描，供疑难字标注、概念提取等服务共享
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick 多模式匹配自动机
+
+    Usage:
+        matcher = AhoCorasick(['玄牝', '牝', '谷神'])
+        for start, end, pattern in matcher.iter_matches(text):
+            ...
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        """
+        编译模式集合
+
+        Args:
+            patterns: 模式字符串集合（空字符串会被忽略）
+        """
+        # 状态 0 为根节点
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # 以该状态结尾的模式（自身）
+        self._terminal: List[Optional[str]] = [None]
+        # 沿失败链最近的终止状态（输出链接）
+        self._output_link: List[int] = [0]
+        self.patterns: List[str] = []
+
+        for pattern in dict.fromkeys(patterns):
+            if pattern:
+                self._add(pattern)
+        self._build_links()
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def _add(self, pattern: str):
+        """将模式插入字典树"""
+        state = 0
+        for char in pattern:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._terminal.append(None)
+                self._output_link.append(0)
+            state = nxt
+        self._terminal[state] = pattern
+        self.patterns.append(pattern)
+
+    def _build_links(self):
+        """广度优先构建失败链接和输出链接"""
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                fail_state = self._fail[nxt]
+                self._output_link[nxt] = (
+                    fail_state if self._terminal[fail_state] is not None
+                    else self._output_link[fail_state]
+                )
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        """
+        查找所有（可重叠的）匹配
+
+        Args:
+            text: 待匹配文本
+
+        Yields:
+            (start, end, pattern)，按结束位置递增
+        """
+        goto = self._goto
+        fail = self._fail
+        terminal = self._terminal
+        output_link = self._output_link
+
+        state = 0
+        for pos, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+
+            match_state = state if terminal[state] is not None else output_link[state]
+            while match_state:
+                pattern = terminal[match_state]
+                end = pos + 1
+                yield end - len(pattern), end, pattern
+                match_state = output_link[match_state]
+
+    def iter_longest(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        """
+        查找不重叠的最左最长匹配
+
+        Args:
+            text: 待匹配文本
+
+        Yields:
+            (start, end, pattern)，按起始位置递增
+        """
+        # 每个起始位置上最长匹配的长度
+        longest = [0] * len(text)
+        for start, end, _pattern in self.iter_matches(text):
+            if end - start > longest[start]:
+                longest[start] = end - start
+
+        pos = 0
+        while pos < len(text):
+            length = longest[pos]
+            if length:
+                yield pos, pos + length, text[pos:pos + length]
+                pos += length
+            else:
+                pos += 1
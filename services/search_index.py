@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+"""
+全文检索 - 字符 n-gram 倒排索引
+每部经典建立一次索引，覆盖原文、现代译文、历代注释和英文译文，
+返回按相关度排序的结果、命中位置及以命中为中心的摘要窗口
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+# 索引的 n-gram 长度（单字与双字）
+NGRAM_SIZES = (1, 2)
+
+# 每个字段最多返回的命中位置数
+MAX_OFFSETS = 20
+
+# 摘要窗口：命中位置两侧各保留的字符数
+SNIPPET_RADIUS = 30
+
+# 每条结果最多返回的摘要窗口数
+MAX_SNIPPETS = 3
+
+# 字段权重（未列出的注释与译文字段使用默认权重）
+FIELD_WEIGHTS = {
+    'original': 3.0,
+    'modern_chinese': 2.0,
+}
+DEFAULT_FIELD_WEIGHT = 1.0
+
+# 字段展示优先级（用于选择摘要来源）
+FIELD_PRIORITY = ('original', 'modern_chinese')
+
+
+def is_searchable_field(field: str) -> bool:
+    """
+    判断字段是否纳入全文检索
+
+    Args:
+        field: 章节字段名
+
+    Returns:
+        是否检索该字段
+    """
+    return (
+        field in ('original', 'modern_chinese')
+        or field.endswith('_note')
+        or field.startswith('english_')
+    )
+
+
+def _field_rank(field: str) -> int:
+    """字段展示顺序：原文、译文优先，其余按原顺序"""
+    if field in FIELD_PRIORITY:
+        return FIELD_PRIORITY.index(field)
+    return len(FIELD_PRIORITY)
+
+
+def build_snippets(
+    field: str,
+    text: str,
+    offsets: List[int],
+    length: int,
+    limit: int = MAX_SNIPPETS
+) -> List[Dict]:
+    """
+    生成以命中位置为中心的摘要窗口，相互重叠的窗口合并为一个
+
+    Args:
+        field: 命中字段名
+        text: 字段原文本
+        offsets: 命中位置（升序）
+        length: 命中长度
+        limit: 最多生成的窗口数
+
+    Returns:
+        摘要窗口列表，每项包含字段名、摘要文本、摘要在字段中的起止位置，
+        以及相对摘要文本的高亮区间 [[start, end], ...]
+    """
+    windows: List[List] = []
+    for offset in offsets:
+        start = max(0, offset - SNIPPET_RADIUS)
+        end = min(len(text), offset + length + SNIPPET_RADIUS)
+        if windows and start <= windows[-1][1]:
+            windows[-1][1] = max(windows[-1][1], end)
+            windows[-1][2].append(offset)
+        else:
+            if len(windows) >= limit:
+                break
+            windows.append([start, end, [offset]])
+
+    return [
+        {
+            'field': field,
+            'text': text[start:end],
+            'start': start,
+            'end': end,
+            'highlights': [[offset - start, offset - start + length] for offset in hit_offsets]
+        }
+        for start, end, hit_offsets in windows
+    ]
+
+
+class SearchIndex:
+    """
+    单部经典的倒排索引
+    索引粒度为章节，查询时先用 n-gram 倒排表求候选章节，
+    再在候选章节的各字段中定位命中位置
+
+    索引只保存倒排表、标题和章节记录的引用，不保存字段文本：
+    候选章节的字段在校验命中与生成摘要时从记录中读取，
+    二进制语料的 LazyRecord 每次读取都从 mmap 解码，检索后不常驻内存
+    """
+
+    def __init__(self, chapters: Iterable[Mapping]):
+        """
+        Args:
+            chapters: 章节数据列表（dict 或 LazyRecord）
+        """
+        # 章节ID -> 章节记录
+        self._records: Dict[int, Mapping] = {}
+        # 章节ID -> 可检索的字段名
+        self._fields: Dict[int, Tuple[str, ...]] = {}
+        self._titles: Dict[int, str] = {}
+        postings: Dict[str, List[int]] = defaultdict(list)
+
+        for chapter in chapters:
+            chapter_id = chapter['chapter']
+            self._records[chapter_id] = chapter
+            self._titles[chapter_id] = chapter.get('title', f'第{chapter_id}章')
+
+            fields = []
+            grams: Set[str] = set()
+            for field in chapter:
+                if not is_searchable_field(field):
+                    continue
+                text = chapter[field]
+                if not isinstance(text, str) or not text:
+                    continue
+                lowered = text.lower()
+                fields.append(field)
+                grams.update(lowered)
+                grams.update(map(''.join, zip(lowered, lowered[1:])))
+            self._fields[chapter_id] = tuple(fields)
+
+            for gram in grams:
+                postings[gram].append(chapter_id)
+
+        # 建立完成后改为元组，去掉列表预留的容量
+        self._postings: Dict[str, Tuple[int, ...]] = {gram: tuple(ids) for gram, ids in postings.items()}
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    def _candidates(self, query: str) -> List[int]:
+        """用倒排表求包含查询全部 n-gram 的候选章节"""
+        size = max(NGRAM_SIZES)
+        if len(query) <= size:
+            grams = {query}
+        else:
+            grams = {query[i:i + size] for i in range(len(query) - size + 1)}
+
+        postings = []
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if not posting:
+                return []
+            postings.append(posting)
+
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                return []
+        return sorted(candidates)
+
+    @staticmethod
+    def _find_offsets(text: str, query: str) -> List[int]:
+        """查找命中位置（不重叠，最多 MAX_OFFSETS 个）"""
+        offsets = []
+        pos = text.find(query)
+        while pos != -1 and len(offsets) < MAX_OFFSETS:
+            offsets.append(pos)
+            pos = text.find(query, pos + len(query))
+        return offsets
+
+    def search(self, query: str, limit: Optional[int] = None, snippets: bool = True) -> List[Dict]:
+        """
+        检索章节
+
+        Args:
+            query: 检索词（不区分大小写）
+            limit: 最多返回的结果数，为 None 时返回全部
+            snippets: 是否生成摘要窗口（可稍后用 add_snippets 补充）
+
+        Returns:
+            按相关度降序排列的结果列表，每项包含章节ID、标题、得分、
+            各字段命中位置，以及以命中为中心的摘要窗口（excerpt 为首个窗口文本）；
+            生成摘要后各字段的命中位置由摘要的高亮区间代替，不再保留
+        """
+        query = query.lower().strip() if query else ''
+        if not query:
+            return []
+
+        results = []
+        for chapter_id in self._candidates(query):
+            record = self._records[chapter_id]
+            hits = []
+            score = 0.0
+            for field in self._fields[chapter_id]:
+                lowered = record[field].lower()
+                count = lowered.count(query)
+                if not count:
+                    continue
+                score += FIELD_WEIGHTS.get(field, DEFAULT_FIELD_WEIGHT) * count
+                hits.append({
+                    'field': field,
+                    'count': count,
+                    'offsets': self._find_offsets(lowered, query)
+                })
+            if not hits:
+                continue
+
+            hits.sort(key=lambda hit: _field_rank(hit['field']))
+            results.append({
+                'id': chapter_id,
+                'title': self._titles[chapter_id],
+                'score': round(score, 2),
+                'hits': hits
+            })
+
+        results.sort(key=lambda r: (-r['score'], r['id']))
+        if limit is not None:
+            results = results[:limit]
+
+        # 仅为返回的结果生成摘要
+        if snippets:
+            self.add_snippets(results, query)
+        return results
+
+    def add_snippets(self, results: List[Dict], query: str):
+        """
+        为检索结果补充摘要窗口（excerpt 与 snippets 字段）
+        摘要生成后删除各字段的原始命中位置（offsets），减小响应体积
+
+        Args:
+            results: 本索引 search 返回的结果
+            query: 检索词
+        """
+        query = query.lower().strip()
+        for result in results:
+            record = self._records[result['id']]
+            snippets = []
+            for hit in result['hits']:
+                snippets.extend(build_snippets(
+                    hit['field'], record[hit['field']], hit['offsets'],
+                    len(query), MAX_SNIPPETS - len(snippets)
+                ))
+                if len(snippets) >= MAX_SNIPPETS:
+                    break
+            result['excerpt'] = snippets[0]['text']
+            result['snippets'] = snippets
+            for hit in result['hits']:
+                hit.pop('offsets', None)
@@ -9,6 +9,7 @@ import re
 from typing import Dict, List, Tuple, Optional
 from collections import defaultdict
 import difflib
+from services.corpus_store import Corpus
 
 
 class SemanticArchaeology:
@@ -74,25 +75,30 @@ class SemanticArchaeology:
         }
     }
 
-    def __init__(self, data_file: str):
+    def __init__(self, data_file: str, corpus: Optional[Corpus] = None):
         self.data_file = data_file
+        self.corpus = corpus
         self.data = None
 
     def load_data(self):
-        """加载数据"""
+        """加载数据（提供共享语料时直接使用，不再重复解析）"""
+        if self.corpus is not None:
+            self.data = self.corpus.data
+            return self.data
         try:
             with open(self.data_file, 'r', encoding='utf-8') as f:
                 self.data = json.load(f)
+            self.corpus = Corpus(None, self.data)
             return self.data
         except FileNotFoundError:
-            return {"title": "道德经", "chapters": []}
+            # 数据文件缺失时使用空语料，后续查询返回空结果
+            self.data = {"title": "道德经", "chapters": []}
+            self.corpus = Corpus(None, self.data)
+            return self.data
 
     def analyze_text_evolution(self, chapter_id: int) -> Dict:
         """分析文本演变"""
-        chapter = next(
-            (c for c in self.data['chapters'] if c['chapter'] == chapter_id),
-            None
-        )
+        chapter = self.corpus.get_chapter(chapter_id)
 
         if not chapter:
             return None
@@ -216,10 +222,7 @@ class SemanticArchaeology:
 
     def compare_interpretation_history(self, chapter_id: int, concept: str) -> Dict:
         """比较历代对同一概念的阐释历史"""
-        chapter = next(
-            (c for c in self.data['chapters'] if c['chapter'] == chapter_id),
-            None
-        )
+        chapter = self.corpus.get_chapter(chapter_id)
 
         if not chapter:
             return None
@@ -360,9 +363,17 @@ class VectorSemanticAnalyzer:
 
 
 # 便捷函数
+def _get_archaeology() -> SemanticArchaeology:
+    """基于共享语料创建道德经语义考古分析器"""
+    from services.classic_service import ClassicService
+
+    service = ClassicService('ddj')
+    return SemanticArchaeology(str(service.data_file), corpus=service.get_corpus())
+
+
 def get_chapter_archaeology(chapter_id: int) -> Dict:
     """获取章节语义考古分析"""
-    archaeology = SemanticArchaeology('data/daodejing.json')
+    archaeology = _get_archaeology()
     archaeology.load_data()
 
     return {
@@ -373,7 +384,7 @@ def get_chapter_archaeology(chapter_id: int) -> Dict:
 
 def get_concept_interpretation_history(chapter_id: int, concept: str) -> Dict:
     """获取概念阐释历史"""
-    archaeology = SemanticArchaeology('data/daodejing.json')
+    archaeology = _get_archaeology()
     archaeology.load_data()
 
     return archaeology.compare_interpretation_history(chapter_id, concept)
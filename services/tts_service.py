@@ -3,7 +3,6 @@
 TTS 服务 - 语音合成代理服务
 """
 
-import requests
 from flask import request, jsonify, Response
 
 
@@ -46,6 +45,9 @@ class FishAudioService(TTSService):
         Returns:
             Flask Response 对象
         """
+        # requests 仅在实际代理请求时加载，缩短冷启动
+        import requests
+
         is_valid, error_msg, data = self.validate_request(['api_key', 'text'])
         if not is_valid:
             return jsonify({'error': error_msg}), 400
@@ -109,6 +111,8 @@ class EdgeTTSService(TTSService):
         Returns:
             Flask Response 对象
         """
+        import requests
+
         is_valid, error_msg, data = self.validate_request(['text'])
         if not is_valid:
             return jsonify({'error': error_msg}), 400
@@ -7,6 +7,7 @@
 import json
 from typing import Dict, List, Optional
 from dataclasses import dataclass
+from services.corpus_store import Corpus
 
 
 @dataclass
@@ -128,25 +129,27 @@ COMMENTATOR_PERSONAS = {
 class VirtualCommentator:
     """虚拟注释家对话管理器"""
 
-    def __init__(self, data_file: str):
+    def __init__(self, data_file: str, corpus: Optional[Corpus] = None):
         self.data_file = data_file
+        self.corpus = corpus
         self.data = None
         self.load_data()
 
     def load_data(self):
-        """加载数据"""
+        """加载数据（提供共享语料时直接使用，不再重复解析）"""
+        if self.corpus is not None:
+            self.data = self.corpus.data
+            return
         try:
             with open(self.data_file, 'r', encoding='utf-8') as f:
                 self.data = json.load(f)
         except FileNotFoundError:
             self.data = {"title": "道德经", "chapters": []}
+        self.corpus = Corpus(None, self.data)
 
     def get_available_commentators(self, chapter_id: int) -> List[Dict]:
         """获取某章节可用的注释家"""
-        chapter = next(
-            (c for c in self.data['chapters'] if c['chapter'] == chapter_id),
-            None
-        )
+        chapter = self.corpus.get_chapter(chapter_id)
 
         if not chapter:
             return []
@@ -198,10 +201,7 @@ class VirtualCommentator:
             return self._error_response("未找到该注释家")
 
         # 获取章节内容
-        chapter = next(
-            (c for c in self.data['chapters'] if c['chapter'] == chapter_id),
-            None
-        )
+        chapter = self.corpus.get_chapter(chapter_id)
 
         if not chapter:
             return self._error_response("未找到该章节")
@@ -440,6 +440,14 @@ def get_commentator_persona(commentator_id: str) -> Optional[Dict]:
     return None
 
 
+def _get_virtual_commentator() -> VirtualCommentator:
+    """基于共享语料创建道德经虚拟注释家"""
+    from services.classic_service import ClassicService
+
+    service = ClassicService('ddj')
+    return VirtualCommentator(str(service.data_file), corpus=service.get_corpus())
+
+
 def generate_commentary_response(
     commentator_id: str,
     chapter_id: int,
@@ -447,7 +455,7 @@ def generate_commentary_response(
     conversation_context: Optional[List[Dict]] = None
 ) -> Dict:
     """生成注释家回应（API入口）"""
-    commentator = VirtualCommentator('data/daodejing.json')
+    commentator = _get_virtual_commentator()
 
     # 获取注释家人设
     persona = COMMENTATOR_PERSONAS.get(commentator_id)
@@ -458,10 +466,7 @@ def generate_commentary_response(
         }
 
     # 获取章节内容
-    chapter = next(
-        (c for c in commentator.data['chapters'] if c['chapter'] == chapter_id),
-        None
-    )
+    chapter = commentator.corpus.get_chapter(chapter_id)
 
     if not chapter:
         return {
@@ -524,7 +529,7 @@ def generate_commentary_response(
 
 def get_commentator_list(chapter_id: int) -> List[Dict]:
     """获取可用注释家列表"""
-    commentator = VirtualCommentator('data/daodejing.json')
+    commentator = _get_virtual_commentator()
     return commentator.get_available_commentators(chapter_id)
 
 
@@ -535,7 +540,7 @@ def chat_with_commentator(
     history: List[Dict] = None
 ) -> Dict:
     """与注释家对话"""
-    commentator = VirtualCommentator('data/daodejing.json')
+    commentator = _get_virtual_commentator()
     return commentator.chat_with_commentator(
         commentator_id, chapter_id, message, history
     )
@@ -543,7 +548,7 @@ def chat_with_commentator(
 
 def start_commentator_debate(chapter_id: int, topic: str, commentators: List[str]) -> Dict:
     """发起注释家辩论"""
-    commentator = VirtualCommentator('data/daodejing.json')
+    commentator = _get_virtual_commentator()
     return commentator.initiate_debate(chapter_id, topic, commentators)
 
 
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+缓存预热 - 启动时预加载语料、索引与热门页面
+预热为可选功能（配置 WARMUP），可在 create_app 中同步执行或在后台线程执行，
+进度与就绪状态通过健康检查接口对外报告
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional
+
+# 默认预渲染的每部经典章节数
+DEFAULT_TOP_N = 10
+
+
+class WarmupState:
+    """
+    预热进度与就绪状态
+    """
+
+    def __init__(self):
+        # disabled: 未启用预热（视为就绪）；pending/running: 预热中；ready: 完成；failed: 出错
+        self.status = 'disabled'
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.steps: List[str] = []
+        self.error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        """是否可以接收流量（预热失败时仍可按需加载，视为就绪）"""
+        return self.status in ('disabled', 'ready', 'failed')
+
+    def begin(self):
+        """标记预热开始"""
+        with self._lock:
+            self.status = 'running'
+            self.started_at = time.time()
+            self.finished_at = None
+            self.steps = []
+            self.error = None
+
+    def record(self, step: str):
+        """记录已完成的预热步骤"""
+        with self._lock:
+            self.steps.append(step)
+
+    def finish(self, error: Optional[str] = None):
+        """标记预热结束"""
+        with self._lock:
+            self.status = 'failed' if error else 'ready'
+            self.error = error
+            self.finished_at = time.time()
+
+    def to_dict(self) -> Dict:
+        """
+        转换为字典（用于健康检查接口）
+
+        Returns:
+            状态字典
+        """
+        with self._lock:
+            duration = None
+            if self.started_at is not None:
+                duration = round((self.finished_at or time.time()) - self.started_at, 3)
+            return {
+                'status': self.status,
+                'ready': self.ready,
+                'duration': duration,
+                'steps': len(self.steps),
+                'error': self.error
+            }
+
+
+# 全局预热状态
+warmup_state = WarmupState()
+
+
+def get_top_pages(classics: List[Dict], top_n: int) -> List[str]:
+    """
+    预渲染的页面路径：各经典首页及前 top_n 章的阅读页
+
+    Args:
+        classics: 经典元数据列表
+        top_n: 每部经典预渲染的章节数
+
+    Returns:
+        页面路径列表
+    """
+    paths = []
+    for classic in classics:
+        classic_id = classic['id']
+        paths.append(f'/{classic_id}/')
+        for chapter_id in range(1, min(top_n, classic.get('chapters', 0)) + 1):
+            paths.append(f'/{classic_id}/chapter/{chapter_id}')
+    return paths
+
+
+def warm_up(app, top_n: int = DEFAULT_TOP_N, state: WarmupState = warmup_state):
+    """
+    执行预热：加载全部经典、建立检索索引、预渲染热门页面
+    只为热门页面生成章节视图与标注，其余章节在首次访问时按需生成
+
+    Args:
+        app: Flask 应用实例
+        top_n: 每部经典预渲染的章节数
+        state: 记录进度的状态对象
+    """
+    from services.classic_service import ClassicService, get_all_classics
+    from services.knowledge_graph import get_concept_graph
+
+    state.begin()
+    try:
+        with app.app_context():
+            classics = get_all_classics()
+            for classic in classics:
+                service = ClassicService(classic['id'])
+                service.get_corpus()
+                service.get_search_index()
+                state.record(f'classic:{classic["id"]}')
+
+            get_concept_graph(ClassicService('ddj').get_corpus())
+            state.record('concept_graph')
+
+        # 经由完整请求流程渲染，同时填充模板编译缓存与页面缓存
+        client = app.test_client()
+        for path in get_top_pages(classics, top_n):
+            client.get(path)
+            state.record(f'page:{path}')
+    except Exception as e:
+        app.logger.exception('Warm-up failed')
+        state.finish(error=str(e))
+        return
+    state.finish()
+
+
+def init_warmup(app) -> Optional[threading.Thread]:
+    """
+    按应用配置启动预热
+
+    Args:
+        app: Flask 应用实例
+
+    Returns:
+        后台预热线程；同步预热或未启用预热时返回 None
+    """
+    if not app.config.get('WARMUP'):
+        return None
+
+    top_n = app.config.get('WARMUP_TOP_N', DEFAULT_TOP_N)
+    if not app.config.get('WARMUP_BACKGROUND', True):
+        warm_up(app, top_n)
+        return None
+
+    warmup_state.status = 'pending'
+    thread = threading.Thread(target=warm_up, args=(app, top_n), name='warmup', daemon=True)
+    thread.start()
+    return thread
@@ -6,7 +6,11 @@
 import pytest
 import json
 import sys
+import os
+import threading
+import time
 from pathlib import Path
+from flask import Flask
 
 # 添加项目根目录到路径
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -18,13 +22,43 @@ from services.classic_service import (
     load_classics_metadata,
     get_classic_metadata,
     get_all_classics,
+    project_fields,
+    get_classic_version,
     validate_classic_id
 )
-from services.annotation_service import annotate_difficult_chars, DIFFICULT_CHARS
+from services.annotation_service import (
+    annotate_difficult_chars,
+    DifficultCharAnnotator,
+    DIFFICULT_CHARS
+)
+from services.pattern_matcher import AhoCorasick
+from services.glossary_service import GlossaryCache
+from services.search_index import SearchIndex
+from services.corpus_store import Corpus, CorpusStore, corpus_store
+from utils.single_flight import SingleFlight
+from services.binary_corpus import (
+    BinaryCorpus,
+    CorpusFormatError,
+    LazyRecord,
+    artifact_path,
+    build_corpus_file,
+    open_binary_corpus
+)
+from services.commentary_similarity import (
+    CommentarySimilarityIndex,
+    minhash_signature,
+    estimate_similarity,
+    shingles,
+    get_similarity_index
+)
 from services.knowledge_graph import (
     ConceptExtractor,
+    ConceptIncidence,
     CommentryAnalyzer,
     KnowledgeGraphBuilder,
+    ConceptGraph,
+    get_concept_graph,
+    get_commentary_spectrum,
     get_chapter_knowledge_graph,
     get_all_concepts
 )
@@ -45,7 +79,26 @@ from services.virtual_commentator import (
     generate_commentary_response,
     COMMENTATOR_PERSONAS
 )
-from utils.validators import validate_chapter_id, validate_search_query
+from services.page_cache import CachedPage, PageCache, page_cache
+from services.warmup import WarmupState, get_top_pages, warm_up, warmup_state
+from utils.http_cache import TemplateVersion, file_digest, get_cache_control
+from utils.security import (
+    RateLimiter,
+    get_client_ip,
+    get_rate_limiter,
+    init_rate_limiter,
+    key_by_api_key,
+    rate_limit,
+    set_rate_limiter
+)
+from utils.rate_limit_store import SQLiteRateLimiter
+from utils.validators import (
+    validate_chapter_id,
+    validate_search_query,
+    validate_pagination,
+    validate_chapter_range,
+    parse_field_list
+)
 
 
 @pytest.fixture
@@ -124,6 +177,146 @@ class TestAnnotationService:
             assert 'difficult' in result or 'data-pinyin' in result
 
 
+    def test_annotate_prefers_longest_match(self):
+        """测试长词优先标注"""
+        result = annotate_difficult_chars('玄牝之门')
+        assert result.count('class="difficult"') == 1
+        assert 'data-pinyin="xuán pìn"' in result
+        assert '>玄牝</span>之门' in result
+
+    def test_annotator_custom_glossary(self):
+        """测试自定义词典标注"""
+        annotator = DifficultCharAnnotator({
+            '鲲': {'pinyin': 'kūn', 'meaning': '大鱼'},
+        })
+        result = annotator.annotate('北冥有鱼，其名为鲲')
+        assert result.startswith('北冥有鱼，其名为<span')
+        assert annotator.annotate('') == ''
+
+
+class TestGlossaryService:
+    """各经典词典测试"""
+
+    def test_classic_uses_own_glossary(self):
+        """测试各经典使用各自的词典"""
+        ddj = ClassicService('ddj').get_glossary()
+        zzj = ClassicService('zzj').get_glossary()
+        assert 'data-pinyin="kūn"' in zzj.annotate('北冥有鱼，其名为鲲')
+        assert 'difficult' not in zzj.annotate('谷神不死')
+        assert 'difficult' in ddj.annotate('谷神不死')
+
+    def test_zhuangzi_chapter_annotated(self):
+        """测试庄子章节使用庄子词典标注"""
+        view = ClassicService('zzj').get_chapter_with_annotation(1)
+        assert 'data-pinyin="kūn"' in view['original_annotated']
+
+    def test_glossary_cache_invalidated_on_change(self, tmp_path):
+        """测试词典文件修改后标注缓存失效"""
+        import os
+        glossary_file = tmp_path / 'glossary.json'
+        glossary_file.write_text('{"甲": {"pinyin": "jiǎ", "meaning": "天干"}}', encoding='utf-8')
+        cache = GlossaryCache(glossary_file, check_interval=0)
+        assert 'jiǎ' in cache.annotate_chapter(1, '甲乙')
+        version = cache.version
+
+        glossary_file.write_text('{"乙": {"pinyin": "yǐ", "meaning": "天干"}}', encoding='utf-8')
+        stat = glossary_file.stat()
+        os.utime(glossary_file, (stat.st_atime, stat.st_mtime + 10))
+        result = cache.annotate_chapter(1, '甲乙')
+        assert cache.version > version
+        assert 'yǐ' in result
+        assert 'jiǎ' not in result
+
+    def test_glossary_cache_follows_chapter_text(self, tmp_path):
+        """测试章节原文变化（如热加载后的新语料）时不返回旧标注"""
+        glossary_file = tmp_path / 'glossary.json'
+        glossary_file.write_text('{"甲": {"pinyin": "jiǎ", "meaning": "天干"}}', encoding='utf-8')
+        cache = GlossaryCache(glossary_file, check_interval=0)
+        assert cache.annotate_chapter(1, '甲乙').endswith('乙')
+        assert cache.annotate_chapter(1, '甲丙').endswith('丙')
+
+    def test_glossary_cache_without_file(self):
+        """测试未声明词典的经典不做标注"""
+        cache = GlossaryCache(None)
+        assert cache.annotate_chapter(1, '谷神不死') == '谷神不死'
+
+
+class TestSearchIndex:
+    """全文检索索引测试"""
+
+    CHAPTERS = [
+        {'chapter': 1, 'original': '道可道，非常道', 'wangbi_note': '可道之道',
+         'english_lau': 'The way that can be spoken of'},
+        {'chapter': 2, 'original': '天下皆知美之为美', 'modern_chinese': '天下人都知道'},
+    ]
+
+    def test_search_ranks_and_reports_offsets(self):
+        """测试结果排序与命中位置"""
+        index = SearchIndex(self.CHAPTERS)
+        results = index.search('道', snippets=False)
+        assert [r['id'] for r in results] == [1, 2]
+        hit = results[0]['hits'][0]
+        assert hit['field'] == 'original'
+        assert hit['offsets'] == [0, 2, 6]
+        assert any(h['field'] == 'wangbi_note' for h in results[0]['hits'])
+
+    def test_search_multi_char_and_english(self):
+        """测试多字查询与英文译文检索"""
+        index = SearchIndex(self.CHAPTERS)
+        assert [r['id'] for r in index.search('天下皆知')] == [2]
+        results = index.search('WAY', snippets=False)
+        assert results[0]['hits'][0] == {'field': 'english_lau', 'count': 1, 'offsets': [4]}
+        assert index.search('不存在') == []
+        assert index.search('') == []
+
+    def test_search_snippets_centered_on_hits(self):
+        """测试摘要窗口以命中为中心并给出高亮区间"""
+        text = '甲' * 100 + '上善若水' + '乙' * 100
+        index = SearchIndex([{'chapter': 1, 'wangbi_note': text}])
+        result = index.search('上善若水')[0]
+        snippet = result['snippets'][0]
+        assert snippet['field'] == 'wangbi_note'
+        assert snippet['start'] == 70
+        start, end = snippet['highlights'][0]
+        assert snippet['text'][start:end] == '上善若水'
+        assert result['excerpt'] == snippet['text']
+        # 摘要已给出高亮区间，原始命中位置不再返回
+        assert 'offsets' not in result['hits'][0]
+
+    def test_build_snippets_merges_overlaps(self):
+        """测试相邻命中合并为一个窗口"""
+        from services.search_index import build_snippets
+        text = 'The Tao and the Tao again'
+        snippets = build_snippets('english_lau', text, [4, 16], 3)
+        assert len(snippets) == 1
+        assert snippets[0]['highlights'] == [[4, 7], [16, 19]]
+
+    def test_classic_service_search_commentary(self):
+        """测试经典服务检索注释内容"""
+        results = ClassicService('ddj').search_chapters('以无为本')
+        assert len(results) > 0
+        assert 'excerpt' in results[0]
+        assert all(h['field'].endswith('_note') for h in results[0]['hits'])
+
+
+class TestPatternMatcher:
+    """多模式匹配测试"""
+
+    def test_iter_matches_overlapping(self):
+        """测试查找重叠匹配"""
+        matcher = AhoCorasick(['he', 'she', 'his', 'hers'])
+        matches = list(matcher.iter_matches('ushers'))
+        assert (1, 4, 'she') in matches
+        assert (2, 4, 'he') in matches
+        assert (2, 6, 'hers') in matches
+
+    def test_iter_longest(self):
+        """测试最左最长匹配"""
+        matcher = AhoCorasick(['谷', '谷神', '神'])
+        assert list(matcher.iter_longest('谷神不死')) == [(0, 2, '谷神')]
+        assert list(matcher.iter_longest('')) == []
+
+
 class TestValidators:
     """输入验证测试"""
 
@@ -158,6 +351,28 @@ class TestValidators:
         assert is_valid is False
         assert '长度' in error
 
+    def test_validate_pagination(self):
+        """测试分页参数规范化"""
+        assert validate_pagination('2', '10') == (2, 10)
+        assert validate_pagination('abc', None) == (1, 20)
+        assert validate_pagination(0, 500) == (1, 50)
+
+    def test_validate_chapter_range(self):
+        """测试章节范围解析"""
+        assert validate_chapter_range('1-3,5') == ([1, 2, 3, 5], None)
+        assert validate_chapter_range('3,1-2,2') == ([1, 2, 3], None)
+        assert validate_chapter_range('')[0] == list(range(1, 82))
+        for value in ('0-3', '5-3', '1-82', 'a', '1-'):
+            chapter_ids, error = validate_chapter_range(value)
+            assert chapter_ids is None
+            assert error is not None
+
+    def test_parse_field_list(self):
+        """测试字段列表解析"""
+        assert parse_field_list('original, wangbi_note,original') == ['original', 'wangbi_note']
+        assert parse_field_list('a-b,ok') == ['ok']
+        assert parse_field_list('') is None
+
     def test_validate_search_query_xss(self):
         """测试XSS攻击防护"""
         xss_query = '<script>alert("xss")</script>'
@@ -204,12 +419,53 @@ class TestRoutes:
         assert response.status_code == 200
         data = json.loads(response.data)
         assert data['chapter'] == 1
+        assert data['next_chapter'] == {'id': 2, 'title': '第2章'}
 
     def test_api_chapter_invalid(self, client):
         """测试无效单章API"""
         response = client.get('/api/daodejing/chapter/999')
         assert response.status_code == 404
 
+    def test_api_export_ndjson(self, client):
+        """测试整部经典 NDJSON 流式导出"""
+        response = client.get('/api/ddj/export')
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        assert response.is_streamed
+        lines = response.data.decode('utf-8').splitlines()
+        assert len(lines) == 81
+        assert json.loads(lines[0]) == ClassicService('ddj').get_chapter(1)
+
+    def test_api_export_fields(self, client):
+        """测试导出字段投影"""
+        response = client.get('/api/ddj/export?fields=original,wangbi_note,unknown')
+        record = json.loads(response.data.decode('utf-8').splitlines()[0])
+        assert set(record) == {'chapter', 'original', 'wangbi_note'}
+
+        response = client.get('/api/nonexistent/export')
+        assert response.status_code == 404
+
+    def test_api_chapter_fields(self, client):
+        """测试单章API字段投影"""
+        response = client.get('/api/ddj/chapter/1?fields=original,wangbi_note')
+        data = json.loads(response.data)
+        assert set(data) == {'chapter', 'original', 'wangbi_note'}
+
+        response = client.get('/api/ddj/chapter/1?exclude=wangbi_note,chapter')
+        data = json.loads(response.data)
+        assert 'wangbi_note' not in data
+        assert data['chapter'] == 1
+        assert 'original_annotated' in data
+
+    def test_api_meta_fields(self, client):
+        """测试元数据API字段投影"""
+        response = client.get('/api/ddj/meta?fields=name')
+        assert json.loads(response.data) == {'id': 'ddj', 'name': '道德经'}
+
+        response = client.get('/api/classics?exclude=commentators')
+        data = json.loads(response.data)
+        assert all('commentators' not in c and 'id' in c for c in data['classics'])
+
     def test_api_search(self, client):
         """测试搜索API"""
         response = client.get('/api/daodejing/search?q=道')
@@ -217,6 +473,32 @@ class TestRoutes:
         data = json.loads(response.data)
         assert 'results' in data
 
+    def test_api_search_pagination(self, client):
+        """测试单经典检索分页与结果上限"""
+        response = client.get('/api/ddj/search?q=道&limit=5&page=2')
+        data = json.loads(response.data)
+        assert len(data['results']) == 5
+        assert data['page'] == 2 and data['per_page'] == 5
+        assert data['total'] > 10
+        assert all('offsets' not in h for r in data['results'] for h in r['hits'])
+
+    def test_api_search_all_classics(self, client):
+        """测试跨经典检索API"""
+        response = client.get('/api/search?q=鲲')
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['facets'] == {'ddj': 0, 'zzj': 1}
+        assert data['results'][0]['classic_id'] == 'zzj'
+        assert 'snippets' in data['results'][0]
+
+    def test_api_search_all_pagination(self, client):
+        """测试跨经典检索分页"""
+        response = client.get('/api/search?q=道&per_page=5&page=2')
+        data = json.loads(response.data)
+        assert len(data['results']) == 5
+        assert data['page'] == 2
+        assert data['total'] == sum(data['facets'].values())
+
     def test_api_search_invalid(self, client):
         """测试无效搜索API（XSS）"""
         response = client.get('/api/daodejing/search?q=<script>')
@@ -244,6 +526,411 @@ class TestSecurity:
         # 这里只是模拟结构
         pass
 
+    def test_rate_limiter_sliding_window(self):
+        """测试滑动窗口计数：超限拒绝，上一窗口按时间比例衰减"""
+        limiter = RateLimiter()
+        assert [limiter.check('ip', 3, 10, now=100 + i).allowed for i in range(4)] == \
+            [True, True, True, False]
+        denied = limiter.check('ip', 3, 10, now=104.5)
+        assert not denied.allowed and denied.remaining == 0
+        # 到 retry_after 之前仍拒绝，之后放行
+        assert not limiter.check('ip', 3, 10, now=104.5 + denied.retry_after - 0.1).allowed
+        assert limiter.check('ip', 3, 10, now=104.5 + denied.retry_after + 0.01).allowed
+        # 超过两个窗口后计数清零
+        assert limiter.check('ip', 3, 10, now=200).remaining == 2
+
+    def test_rate_limiter_bounded_keys(self):
+        """测试跟踪的标识符数有上限，且淘汰空闲标识符"""
+        limiter = RateLimiter(max_keys=100)
+        for i in range(1000):
+            limiter.check(f'ip{i}', 10, 60, now=1000)
+        assert len(limiter) == 100
+        limiter.check('late', 10, 60, now=1000 + 180)
+        assert len(limiter) == 1
+
+    def test_rate_limiter_thread_safe(self):
+        """测试并发请求时放行数不超过上限"""
+        limiter = RateLimiter()
+        allowed = []
+        threads = [threading.Thread(target=lambda: allowed.append(limiter.is_allowed('ip', 50, 60)))
+                   for _ in range(200)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert allowed.count(True) == 50
+
+
+class TestRateLimitBackends:
+    """速率限制存储测试"""
+
+    def test_sqlite_backend_limits(self, tmp_path):
+        """测试 SQLite 存储的滑动窗口计数与内存存储一致"""
+        limiter = SQLiteRateLimiter(tmp_path / 'limits.db')
+        memory = RateLimiter()
+        for i in range(5):
+            now = 100 + i * 1.5
+            assert limiter.check('ip', 3, 10, now=now) == memory.check('ip', 3, 10, now=now)
+        limiter.clear('ip')
+        assert len(limiter) == 0
+
+    def test_sqlite_backend_shared_across_instances(self, tmp_path):
+        """测试多个进程（各自的实例与连接）共享计数"""
+        path = tmp_path / 'limits.db'
+        workers = [SQLiteRateLimiter(path) for _ in range(4)]
+        allowed = []
+        threads = [
+            threading.Thread(target=lambda w=w: allowed.extend(w.is_allowed('ip', 10, 60) for _ in range(10)))
+            for w in workers
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert allowed.count(True) == 10
+
+    def test_backend_interface_is_abstract(self):
+        """测试未实现全部方法的存储在实例化时报错"""
+        from utils.security import RateLimitBackend
+
+        class Incomplete(RateLimitBackend):
+            def clear(self, key=None):
+                pass
+
+        with pytest.raises(TypeError):
+            Incomplete()
+
+    def test_sqlite_default_path_in_instance_dir(self, tmp_path):
+        """测试未配置数据库路径时使用应用 instance 目录"""
+        test_app = Flask(__name__, instance_path=str(tmp_path / 'instance'))
+        test_app.config['RATE_LIMIT_BACKEND'] = 'sqlite'
+        try:
+            init_rate_limiter(test_app)
+            assert get_rate_limiter().path == str(tmp_path / 'instance' / 'ratelimit.sqlite3')
+        finally:
+            set_rate_limiter(RateLimiter())
+
+    def test_init_rate_limiter_from_config(self, tmp_path):
+        """测试按配置选择存储"""
+        test_app = Flask(__name__)
+        test_app.config.update(RATE_LIMIT_BACKEND='sqlite', RATE_LIMIT_DB=str(tmp_path / 'limits.db'))
+        try:
+            init_rate_limiter(test_app)
+            assert isinstance(get_rate_limiter(), SQLiteRateLimiter)
+        finally:
+            set_rate_limiter(RateLimiter())
+        test_app.config['RATE_LIMIT_BACKEND'] = 'redis'
+        with pytest.raises(ValueError):
+            init_rate_limiter(test_app)
+
+
+class TestRateLimitKeys:
+    """限流标识、路由组与响应头测试"""
+
+    @pytest.fixture
+    def limiter(self):
+        """每个测试使用独立的内存限流器"""
+        limiter = RateLimiter()
+        set_rate_limiter(limiter)
+        yield limiter
+        set_rate_limiter(RateLimiter())
+
+    def test_client_ip_trusted_hops(self):
+        """测试只采用可信代理追加的 X-Forwarded-For 条目"""
+        headers = {'X-Forwarded-For': '6.6.6.6, 1.2.3.4, 10.0.0.1'}
+        with app.test_request_context(headers=headers, environ_base={'REMOTE_ADDR': '10.0.0.2'}):
+            assert get_client_ip(0) == '10.0.0.2'
+            assert get_client_ip(1) == '10.0.0.1'
+            assert get_client_ip(2) == '1.2.3.4'
+            assert get_client_ip(9) == '6.6.6.6'
+        with app.test_request_context(headers={'X-Real-IP': '1.2.3.4'}):
+            assert get_client_ip(1) == '1.2.3.4'
+
+    def test_proxy_headers_ignored_by_default(self):
+        """测试默认（无可信代理）不采信客户端提供的代理头"""
+        headers = {'X-Forwarded-For': '6.6.6.6', 'X-Real-IP': '7.7.7.7'}
+        with app.test_request_context(headers=headers, environ_base={'REMOTE_ADDR': '10.0.0.2'}):
+            assert get_client_ip() == '10.0.0.2'
+
+    def test_legacy_search_counted_once(self, limiter):
+        """测试向后兼容的检索路由每次请求只计一次"""
+        first = app.test_client().get('/api/daodejing/search?q=道')
+        second = app.test_client().get('/api/daodejing/search?q=道')
+        remaining = int(first.headers['X-RateLimit-Remaining'])
+        assert int(second.headers['X-RateLimit-Remaining']) == remaining - 1
+
+    def test_api_key_identity(self):
+        """测试按 API Key 限流，未携带时回退到 IP"""
+        with app.test_request_context(headers={'X-API-Key': 'secret'}):
+            identity = key_by_api_key()
+            assert identity.startswith('key:') and 'secret' not in identity
+        with app.test_request_context(environ_base={'REMOTE_ADDR': '1.2.3.4'}):
+            assert key_by_api_key() == 'ip:1.2.3.4'
+
+    def test_rate_limit_headers_and_retry_after(self, limiter):
+        """测试响应携带 X-RateLimit-* 头，超限时返回 Retry-After"""
+        test_app = Flask(__name__)
+
+        @test_app.route('/limited')
+        @rate_limit(max_requests=2, window=60)
+        def limited():
+            return 'ok'
+
+        client = test_app.test_client()
+        first = client.get('/limited')
+        assert first.headers['X-RateLimit-Limit'] == '2'
+        assert first.headers['X-RateLimit-Remaining'] == '1'
+        client.get('/limited')
+        denied = client.get('/limited')
+        assert denied.status_code == 429
+        assert 1 <= int(denied.headers['Retry-After']) <= 120
+        assert denied.get_json()['retry_after'] == int(denied.headers['Retry-After'])
+        assert denied.headers['X-RateLimit-Remaining'] == '0'
+
+    def test_route_group_buckets(self, limiter):
+        """测试同组路由共享额度，不同组及不同客户端互不影响"""
+        test_app = Flask(__name__)
+        test_app.config['TRUSTED_PROXY_HOPS'] = 1
+
+        @test_app.route('/a')
+        @rate_limit(max_requests=1, window=60, group='g')
+        def a():
+            return 'a'
+
+        @test_app.route('/b')
+        @rate_limit(max_requests=1, window=60, group='g')
+        def b():
+            return 'b'
+
+        @test_app.route('/c')
+        @rate_limit(max_requests=1, window=60)
+        def c():
+            return 'c'
+
+        client = test_app.test_client()
+        user = {'X-Forwarded-For': '1.1.1.1'}
+        assert client.get('/a', headers=user).status_code == 200
+        assert client.get('/b', headers=user).status_code == 429
+        assert client.get('/c', headers=user).status_code == 200
+        assert client.get('/a', headers={'X-Forwarded-For': '2.2.2.2'}).status_code == 200
+
+
+class TestHttpCache:
+    """ETag 与条件请求测试"""
+
+    def test_file_digest_tracks_content(self, tmp_path):
+        """测试文件哈希随内容变化"""
+        path = tmp_path / 'chapters.json'
+        path.write_text('{"chapters": []}', encoding='utf-8')
+        first = file_digest(path)
+        assert first == file_digest(path)
+        path.write_text('{"chapters": [{}]}', encoding='utf-8')
+        assert file_digest(path) != first
+        assert file_digest(tmp_path / 'missing.json') == ''
+
+    def test_template_version_changes(self, tmp_path):
+        """测试模板目录版本随模板修改变化"""
+        (tmp_path / 'page.html').write_text('a', encoding='utf-8')
+        version = TemplateVersion(tmp_path, check_interval=0)
+        first = version.get()
+        (tmp_path / 'page.html').write_text('bb', encoding='utf-8')
+        assert version.get() != first
+
+    def test_classic_version_per_classic(self):
+        """测试各经典版本独立"""
+        assert get_classic_version('ddj') == get_classic_version('ddj')
+        assert get_classic_version('ddj') != get_classic_version('zzj')
+
+    def test_cache_control(self):
+        """测试 Cache-Control 头"""
+        assert get_cache_control(0) == 'public, no-cache'
+        assert get_cache_control(60) == 'public, max-age=60'
+
+    def test_api_conditional_get(self, client):
+        """测试 API 命中 If-None-Match 时返回 304"""
+        response = client.get('/api/ddj/chapter/1')
+        etag = response.headers['ETag']
+        assert response.headers['Cache-Control'] == 'public, no-cache'
+
+        response = client.get('/api/ddj/chapter/1', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert response.data == b''
+        assert response.headers['ETag'] == etag
+
+        # 不同字段投影是不同的表示
+        response = client.get('/api/ddj/chapter/1?fields=original', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+
+    def test_page_conditional_get(self, client):
+        """测试页面命中 If-None-Match 时返回 304"""
+        response = client.get('/ddj/chapter/1')
+        etag = response.headers['ETag']
+        response = client.get('/ddj/chapter/1', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+
+    def test_error_response_has_no_etag(self, client):
+        """测试错误响应不带 ETag"""
+        response = client.get('/api/ddj/chapter/999')
+        assert response.status_code == 404
+        assert 'ETag' not in response.headers
+
+
+class TestPageCache:
+    """页面缓存测试"""
+
+    def test_lru_eviction_by_bytes(self):
+        """测试按字节数淘汰最久未用的页面"""
+        cache = PageCache(max_bytes=CachedPage.compress(b'a' * 100).size * 2)
+        cache.put(('a',), b'a' * 100)
+        cache.put(('b',), b'b' * 100)
+        assert cache.get(('a',)) is not None
+        cache.put(('c',), b'c' * 100)
+        assert cache.get(('b',)) is None
+        assert cache.get(('a',)) is not None
+        assert cache.size <= cache.max_bytes
+
+    def test_precompressed_variants(self):
+        """测试预压缩版本与内容协商"""
+        import gzip
+        from werkzeug.datastructures import Accept
+        page = CachedPage.compress('道可道，非常道'.encode('utf-8') * 50)
+        assert gzip.decompress(page.variants['gzip']) == page.variants['identity']
+        encoding, body = page.negotiate(Accept([('gzip', 1)]))
+        assert encoding == 'gzip'
+        encoding, body = page.negotiate(Accept([]))
+        assert encoding == 'identity'
+
+    def test_disk_cache_shared(self, tmp_path):
+        """测试磁盘缓存可被另一个缓存实例读取"""
+        PageCache(disk_dir=tmp_path).put(('/ddj/chapter/1', 'v1'), b'<html></html>')
+        other = PageCache(disk_dir=tmp_path)
+        page = other.get(('/ddj/chapter/1', 'v1'))
+        assert page is not None
+        assert page.variants['identity'] == b'<html></html>'
+        assert other.get(('/ddj/chapter/1', 'v2')) is None
+        other.clear()
+        assert PageCache(disk_dir=tmp_path).get(('/ddj/chapter/1', 'v1')) is None
+
+    def test_disk_cache_bounded(self, tmp_path):
+        """测试磁盘缓存超出上限时删除最久未用的条目"""
+        page_size = CachedPage.compress(b'x' * 1000).size
+        cache = PageCache(disk_dir=tmp_path, disk_max_bytes=page_size * 3)
+        for version in range(3):
+            cache.put(('/p', f'v{version}'), b'x' * 1000)
+        os.utime(str(tmp_path / cache._disk_name(('/p', 'v0'))) + '.html', (1, 1))
+        cache.put(('/p', 'v3'), b'x' * 1000)
+        reader = PageCache(disk_dir=tmp_path)
+        assert reader.get(('/p', 'v0')) is None
+        assert reader.get(('/p', 'v3')) is not None
+        assert sum(p.stat().st_size for p in tmp_path.iterdir()) <= page_size * 3
+
+    def test_glossary_edit_not_cached_under_new_version(self, client):
+        """测试词典修改后页面不会以旧词典渲染却记在新版本（ETag）下"""
+        glossary_file = Path(__file__).parent.parent / 'data' / 'zhuangzi' / 'glossary.json'
+        original = glossary_file.read_text(encoding='utf-8')
+        before = client.get('/zzj/chapter/1')
+        try:
+            glossary_file.write_text(original.replace('"kūn"', '"kūn-test"'), encoding='utf-8')
+            stat = glossary_file.stat()
+            os.utime(glossary_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+            # 词典检查间隔内：ETag 变化时内容必须已经更新
+            during = client.get('/zzj/chapter/1')
+            if during.headers['ETag'] != before.headers['ETag']:
+                assert 'kūn-test' in during.data.decode('utf-8')
+            else:
+                assert during.data == before.data
+
+            time.sleep(1.1)
+            after = client.get('/zzj/chapter/1')
+            assert after.headers['ETag'] != before.headers['ETag']
+            assert 'kūn-test' in after.data.decode('utf-8')
+        finally:
+            glossary_file.write_text(original, encoding='utf-8')
+
+    def test_not_modified_keeps_vary(self, client):
+        """测试 304 响应与 200 响应携带相同的 Vary"""
+        first = client.get('/ddj/chapter/4')
+        again = client.get('/ddj/chapter/4', headers={'If-None-Match': first.headers['ETag']})
+        assert again.status_code == 304
+        assert 'Accept-Encoding' in again.headers['Vary']
+
+    def test_page_served_compressed(self, client):
+        """测试页面按 Accept-Encoding 返回压缩版本"""
+        import gzip
+        plain = client.get('/ddj/chapter/3')
+        assert plain.status_code == 200
+        assert 'Accept-Encoding' in plain.headers['Vary']
+
+        compressed = client.get('/ddj/chapter/3', headers={'Accept-Encoding': 'gzip'})
+        assert compressed.headers['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(compressed.data) == plain.data
+        assert compressed.headers['ETag'] != plain.headers['ETag']
+
+    def test_compare_view(self, client):
+        """测试多版本对照页渲染"""
+        response = client.get('/ddj/compare/2')
+        assert response.status_code == 200
+        assert '王弼' in response.data.decode('utf-8')
+
+
+class TestWarmup:
+    """启动预热测试"""
+
+    def test_top_pages(self):
+        """测试预渲染页面列表"""
+        classics = [{'id': 'ddj', 'chapters': 81}, {'id': 'zzj', 'chapters': 2}]
+        assert get_top_pages(classics, 3) == [
+            '/ddj/', '/ddj/chapter/1', '/ddj/chapter/2', '/ddj/chapter/3',
+            '/zzj/', '/zzj/chapter/1', '/zzj/chapter/2'
+        ]
+
+    def test_warm_up_populates_caches(self):
+        """测试预热加载全部经典并预渲染页面"""
+        state = WarmupState()
+        page_cache.clear()
+        warm_up(app, top_n=2, state=state)
+        assert state.status == 'ready'
+        assert state.ready
+        assert corpus_store._corpora.keys() >= {'ddj', 'zzj'}
+        assert ClassicService('zzj').get_corpus().search_index is not None
+        assert len(page_cache) >= 6
+        assert state.to_dict()['steps'] == len(state.steps)
+
+    def test_health_reports_readiness(self, client):
+        """测试健康检查在预热期间返回 503"""
+        response = client.get('/api/health')
+        assert response.status_code == 200
+        assert json.loads(response.data)['warmup']['ready'] is True
+
+        warmup_state.begin()
+        try:
+            response = client.get('/api/health')
+            assert response.status_code == 503
+            assert json.loads(response.data)['status'] == 'warming'
+        finally:
+            warmup_state.finish()
+
+
+class TestColdStart:
+    """冷启动测试"""
+
+    def test_single_app_instance(self):
+        """测试 app 模块只创建一个应用实例"""
+        import app as app_module
+        assert app_module.get_app() is app
+        assert app_module.vercel_app is app
+
+    def test_cold_start_defers_heavy_modules(self):
+        """测试入口冷启动不导入分析服务与 TTS（检查子进程的 sys.modules，不比较耗时）"""
+        sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+        from benchmark_startup import measure_cold_start
+
+        result = measure_cold_start()
+        assert result['apps'] == 1
+        assert result['loaded'] == []
+
 
 class TestClassicService:
     """经典服务测试"""
@@ -327,6 +1014,30 @@ class TestClassicService:
         chapter = service.get_chapter(999)
         assert chapter is None
 
+    def test_chapter_view_is_memoized_and_readonly(self):
+        """测试章节视图缓存且不修改共享章节数据"""
+        service = ClassicService('ddj')
+        view = service.get_chapter_with_annotation(2)
+        assert service.get_chapter_with_annotation(2) is view
+        assert view['prev_chapter'] == {'id': 1, 'title': '第1章'}
+        assert view['next_chapter']['id'] == 3
+        assert view['total_chapters'] == 81
+
+        record = service.get_chapter(2)
+        assert 'original_annotated' not in record
+        assert 'prev_chapter' not in record
+        with pytest.raises(TypeError):
+            view['original'] = 'x'
+
+    def test_chapter_view_to_dict(self):
+        """测试章节视图序列化"""
+        view = ClassicService('ddj').get_chapter_with_annotation(1)
+        data = view.to_dict()
+        assert data['chapter'] == 1
+        assert data['prev_chapter'] is None
+        assert 'original_annotated' in data
+        assert len(data) == len(view)
+
     def test_classic_service_get_commentators(self):
         """测试获取注释家列表"""
         service = ClassicService('ddj')
@@ -367,9 +1078,330 @@ class TestClassicService:
         assert data is not None
 
 
+class TestFieldProjection:
+    """字段投影测试"""
+
+    def test_project_fields(self):
+        """测试投影保留主键并按顺序取字段"""
+        record = {'chapter': 1, 'original': 'a', 'wangbi_note': 'b', 'suzhe_note': 'c'}
+        assert project_fields(record) is record
+        assert project_fields(record, ['suzhe_note', 'missing']) == {'chapter': 1, 'suzhe_note': 'c'}
+        assert project_fields(record, exclude=['wangbi_note', 'chapter']) == \
+            {'chapter': 1, 'original': 'a', 'suzhe_note': 'c'}
+
+    def test_chapter_view_projection_cached(self):
+        """测试章节视图按字段集合缓存投影"""
+        view = ClassicService('ddj').get_chapter_with_annotation(2)
+        projected = view.project(['original'])
+        assert projected == {'chapter': 2, 'original': view['original']}
+        assert view.project(['original']) is projected
+        assert view.project(['original'], ['chapter']) is not projected
+        assert view.project() == view.to_dict()
+
+
+class TestBinaryCorpus:
+    """二进制语料测试"""
+
+    @pytest.fixture
+    def data_file(self, tmp_path):
+        """临时经典数据文件"""
+        path = tmp_path / 'chapters.json'
+        data = {
+            'title': '测试',
+            'chapters': [
+                {'chapter': 1, 'original': '道可道', 'wangbi_note': '此版本暂未收录'},
+                {'chapter': 2, 'original': '天下皆知', 'suzhe_note': '此版本暂未收录'},
+            ]
+        }
+        path.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+        return path
+
+    def test_round_trip(self, data_file):
+        """测试编译后解码结果与 JSON 一致"""
+        target = build_corpus_file(data_file)
+        assert target == artifact_path(data_file)
+        corpus = open_binary_corpus(data_file)
+        assert corpus.to_data() == json.loads(data_file.read_text(encoding='utf-8'))
+        assert corpus.chapter_ids == [1, 2]
+        assert corpus.get_field(2, 'original') == '天下皆知'
+        assert corpus.get_field(2, 'wangbi_note', '') == ''
+        assert corpus.get_field(9, 'original') is None
+
+    def test_stale_artifact_ignored(self, data_file):
+        """测试数据文件修改后不再使用旧产物"""
+        build_corpus_file(data_file)
+        data_file.write_text(json.dumps({'title': '改', 'chapters': []}), encoding='utf-8')
+        assert open_binary_corpus(data_file) is None
+
+    def test_unchanged_source_not_hashed(self, data_file, monkeypatch):
+        """测试源文件修改时间与大小未变时不重新计算哈希，仅修改时间变化时按哈希校验"""
+        import services.binary_corpus as binary_corpus_module
+        build_corpus_file(data_file)
+        digests = []
+        monkeypatch.setattr(binary_corpus_module, 'file_digest',
+                            lambda path: digests.append(path) or file_digest(path))
+        assert open_binary_corpus(data_file) is not None
+        assert digests == []
+        os.utime(data_file, ns=(0, 0))
+        assert open_binary_corpus(data_file) is not None
+        assert len(digests) == 1
+
+    def test_corrupt_artifact_ignored(self, data_file):
+        """测试损坏的产物回退到 JSON"""
+        artifact_path(data_file).write_bytes(b'not a corpus')
+        assert open_binary_corpus(data_file) is None
+        with pytest.raises(CorpusFormatError):
+            BinaryCorpus(artifact_path(data_file))
+
+    def test_store_prefers_binary(self, data_file):
+        """测试语料库优先加载二进制语料"""
+        store = CorpusStore()
+        assert store.get('json', data_file).binary is None
+        build_corpus_file(data_file)
+        corpus = store.get('bin', data_file)
+        assert corpus.binary is not None
+        assert corpus.get_chapter(1)['original'] == '道可道'
+        assert isinstance(corpus.get_chapter(1), LazyRecord)
+
+    def test_lazy_record_decodes_on_access(self, data_file):
+        """测试按需解码：只有被访问的字段才解码，且解码结果不保留在记录中"""
+        build_corpus_file(data_file)
+        corpus = open_binary_corpus(data_file)
+        record = corpus.to_lazy_data()['chapters'][0]
+        read_value = corpus.read_value
+        decoded = []
+        corpus.read_value = lambda string_id, kind: decoded.append(string_id) or read_value(string_id, kind)
+        assert 'wangbi_note' in record
+        assert 'suzhe_note' not in record
+        assert decoded == []
+        assert record['original'] == '道可道'
+        assert record.get('suzhe_note', '') == ''
+        assert len(decoded) == 1
+        assert record['original'] == '道可道'
+        assert len(decoded) == 2
+        assert record == {'chapter': 1, 'original': '道可道', 'wangbi_note': '此版本暂未收录'}
+        assert list(record) == ['chapter', 'original', 'wangbi_note']
+        with pytest.raises(AttributeError):
+            record.extra = 1
+
+    def test_committed_artifacts_current(self):
+        """测试随仓库提交的二进制语料与各经典的数据文件一致（部署不执行构建步骤）"""
+        for classic in get_all_classics():
+            data_file = ClassicService(classic['id']).data_file
+            corpus = open_binary_corpus(data_file)
+            assert corpus is not None, f'{artifact_path(data_file)} 缺失或已过期，请运行 scripts/build_corpus.py'
+            corpus.close()
+
+    def test_search_index_over_lazy_records(self, data_file):
+        """测试基于 LazyRecord 的检索与 JSON 数据一致，索引不保存字段文本"""
+        build_corpus_file(data_file)
+        corpus = open_binary_corpus(data_file)
+        lazy_index = SearchIndex(corpus.to_lazy_data()['chapters'])
+        assert lazy_index.search('道') == SearchIndex(corpus.to_data()['chapters']).search('道')
+        assert all(isinstance(field, str) for fields in lazy_index._fields.values() for field in fields)
+
+    def test_classic_service_get_field(self):
+        """测试按字段读取章节"""
+        service = ClassicService('ddj')
+        assert service.get_field(1, 'original') == service.get_chapter(1)['original']
+        assert service.get_field(999, 'original', '') == ''
+
+
+class TestSingleFlight:
+    """单飞加载测试"""
+
+    def test_concurrent_callers_share_result(self):
+        """测试并发调用只执行一次并共享结果"""
+        flight = SingleFlight()
+        calls = []
+        started = threading.Event()
+
+        def load():
+            calls.append(1)
+            started.set()
+            time.sleep(0.05)
+            return object()
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(flight.do('k', load)))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        started.wait(1)
+        assert flight.in_flight('k')
+        for thread in threads:
+            thread.join()
+        assert len(calls) == 1
+        assert all(r is results[0] for r in results)
+        assert not flight.in_flight('k')
+
+    def test_exception_propagates_and_is_not_cached(self):
+        """测试加载失败时异常传给调用方，且下次重新加载"""
+        flight = SingleFlight()
+        with pytest.raises(ValueError):
+            flight.do('k', lambda: int('x'))
+        assert flight.do('k', lambda: 1) == 1
+
+
+class TestCorpusStore:
+    """共享语料库测试"""
+
+    def test_corpus_store_parses_once(self):
+        """测试同一经典只解析一次"""
+        store = CorpusStore()
+        first = store.get('ddj', 'data/daodejing/chapters.json')
+        second = store.get('ddj', 'data/daodejing/chapters.json')
+        assert first is second
+        assert len(first.data['chapters']) == 81
+
+    def test_corpus_store_missing_file(self):
+        """测试缺失文件不被缓存"""
+        store = CorpusStore()
+        assert store.get('missing', 'data/not_exists.json') is None
+
+    @pytest.fixture
+    def data_file(self, tmp_path):
+        """临时经典数据文件"""
+        path = tmp_path / 'chapters.json'
+        path.write_text(json.dumps({'title': '旧', 'chapters': [{'chapter': 1}]}), encoding='utf-8')
+        return path
+
+    def test_reload_swaps_prepared_corpus(self, data_file):
+        """测试数据文件变化后重新加载，准备完成后才替换"""
+        store = CorpusStore(check_interval=0)
+        old = store.get('t', data_file)
+        prepared = []
+        store.preparer = lambda corpus, previous: prepared.append(
+            store.get('t', data_file) is old and previous is old)
+
+        data_file.write_text(json.dumps({'title': '新', 'chapters': [{'chapter': 1}, {'chapter': 2}]}),
+                             encoding='utf-8')
+        new = store.reload('t')
+        assert prepared == [True]
+        assert store.get('t', data_file) is new
+        assert new.chapter_count == 2
+        assert old.data['title'] == '旧'
+        assert new.version != old.version
+
+    def test_reload_keeps_corpus_when_unchanged_or_broken(self, data_file):
+        """测试内容未变或新文件无法解析时保留原语料"""
+        store = CorpusStore(check_interval=0)
+        old = store.get('t', data_file)
+        os.utime(data_file, ns=(0, 0))
+        assert store.reload('t') is old
+        data_file.write_text('{"title": ', encoding='utf-8')
+        assert store.reload('t') is old
+        assert store.get_version('t', data_file) == old.version
+
+    def test_background_reload(self, data_file):
+        """测试检查到文件变化后在后台重新加载"""
+        store = CorpusStore(check_interval=0.001)
+        old = store.get('t', data_file)
+        data_file.write_text(json.dumps({'title': '新', 'chapters': []}), encoding='utf-8')
+        time.sleep(0.01)
+        assert store.get('t', data_file) is old
+        store.wait_for_reloads(timeout=5)
+        assert store.get('t', data_file).data['title'] == '新'
+
+    def test_prepare_corpus(self):
+        """测试只为新语料重建旧语料已有的检索索引与章节视图"""
+        service = ClassicService('ddj')
+        data = service.load_data()
+        previous = Corpus('ddj', data)
+        corpus = Corpus('ddj', data)
+        service.prepare_corpus(corpus, previous)
+        assert corpus.search_index is None
+        assert corpus.chapter_views == {}
+
+        previous.search_index = SearchIndex(data['chapters'])
+        previous.chapter_views[3] = (0, None)
+        service.prepare_corpus(corpus, previous)
+        assert corpus.search_index is not None
+        assert list(corpus.chapter_views) == [3]
+
+    def test_concurrent_misses_parse_once(self, data_file, monkeypatch):
+        """测试并发的缓存未命中只解析一次"""
+        import services.corpus_store as corpus_store_module
+        calls = []
+        read = corpus_store_module.read_corpus_file
+
+        def slow_read(path):
+            calls.append(path)
+            time.sleep(0.05)
+            return read(path)
+
+        monkeypatch.setattr(corpus_store_module, 'read_corpus_file', slow_read)
+        store = CorpusStore()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(store.get('t', data_file)))
+                   for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(calls) == 1
+        assert len(results) == 16 and all(r is results[0] for r in results)
+
+    def test_derived_built_once_under_concurrency(self):
+        """测试派生数据（检索索引等）在并发首次访问时只构建一次"""
+        corpus = Corpus('t', {'title': 't', 'chapters': [{'chapter': 1, 'original': '道'}]})
+        builds = []
+
+        def build():
+            builds.append(1)
+            time.sleep(0.05)
+            return SearchIndex(corpus.data['chapters'])
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(corpus.get_derived('search_index', build)))
+                   for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(builds) == 1
+        assert all(r is corpus.search_index for r in results)
+
+    def test_corpus_chapter_index(self):
+        """测试章节索引与相邻章节表"""
+        corpus = Corpus('test', {'title': 't', 'chapters': [
+            {'chapter': 1}, {'chapter': 2}, {'chapter': 3}
+        ]})
+        assert corpus.chapter_count == 3
+        assert corpus.get_chapter(2)['chapter'] == 2
+        assert corpus.get_chapter(99) is None
+        prev_chapter, next_chapter = corpus.get_neighbours(1)
+        assert prev_chapter is None
+        assert next_chapter['chapter'] == 2
+        prev_chapter, next_chapter = corpus.get_neighbours(3)
+        assert prev_chapter['chapter'] == 2
+        assert next_chapter is None
+
+    def test_services_share_corpus(self):
+        """测试各服务共享同一份已解析数据"""
+        data = ClassicService('ddj').load_data()
+        assert DataService.load_data() is data
+
+        builder = KnowledgeGraphBuilder('unused.json', corpus=ClassicService('ddj').get_corpus())
+        assert builder.load_data() is data
+
+        commentator = VirtualCommentator('unused.json', corpus=ClassicService('ddj').get_corpus())
+        assert commentator.data is data
+
+
 class TestKnowledgeGraph:
     """知识图谱服务测试"""
 
+    def test_missing_data_file_returns_empty(self):
+        """测试数据文件缺失时返回空结果而不是报错"""
+        from services.semantic_archaeology import SemanticArchaeology
+        builder = KnowledgeGraphBuilder('data/not_exists.json')
+        builder.load_data()
+        assert builder.build_commentary_spectrum(1) == {}
+        archaeology = SemanticArchaeology('data/not_exists.json')
+        archaeology.load_data()
+        assert archaeology.analyze_text_evolution(1) is None
+
     def test_concept_extractor_init(self):
         """测试概念提取器初始化"""
         extractor = ConceptExtractor()
@@ -403,6 +1435,27 @@ class TestKnowledgeGraph:
         network = extractor.build_cooccurrence_network(chapters_data)
         assert isinstance(network, dict)
 
+    def test_concept_incidence_cooccurrence(self):
+        """测试关联矩阵计算共现次数"""
+        incidence = ConceptIncidence()
+        incidence.add_unit({'道', '德'})
+        incidence.add_unit({'道', '德', '无'})
+        incidence.add_unit({'无'})
+        cooccurrence = incidence.cooccurrence()
+        assert cooccurrence['道']['德'] == 2
+        assert cooccurrence['德']['道'] == 2
+        assert cooccurrence['道']['无'] == 1
+        assert '道' not in cooccurrence['道']
+
+    def test_build_cooccurrence_network_sentence_window(self):
+        """测试句级窗口共现"""
+        chapters_data = [{'chapter': 1, 'original': '道可道。圣人无为。天下皆知。'}]
+        chapter_level = ConceptExtractor().build_cooccurrence_network(chapters_data)
+        sentence_level = ConceptExtractor().build_cooccurrence_network(chapters_data, window=1)
+        assert chapter_level['道']['圣人'] == 1
+        assert '圣人' not in sentence_level.get('道', {})
+        assert sentence_level['圣人']['无为'] == 1
+
     def test_commentary_analyzer_init(self):
         """测试注释分析器初始化"""
         analyzer = CommentryAnalyzer()
@@ -478,6 +1531,49 @@ class TestKnowledgeGraph:
         assert 'concept_graph' in result
         assert 'commentary_spectrum' in result
 
+    def test_concept_graph_built_once_per_corpus(self):
+        """测试概念图谱每份语料只构建一次"""
+        corpus = ClassicService('ddj').get_corpus()
+        graph = get_concept_graph(corpus)
+        assert isinstance(graph, ConceptGraph)
+        assert get_concept_graph(corpus) is graph
+        assert graph.full()['edge_count'] > 0
+
+    def test_concept_graph_chapter_slice(self):
+        """测试章节子图只包含本章概念"""
+        graph = get_concept_graph(ClassicService('ddj').get_corpus())
+        subgraph = graph.chapter_slice(1)
+        node_ids = {n['id'] for n in subgraph['nodes']}
+        assert all(1 in n['chapters'] for n in subgraph['nodes'])
+        assert all(e['source'] in node_ids and e['target'] in node_ids for e in subgraph['edges'])
+        assert subgraph['concept_count'] < graph.full()['concept_count']
+        assert graph.chapter_slice(1) is subgraph
+
+    def test_get_chapter_knowledge_graph_full(self):
+        """测试按需返回全局图谱"""
+        result = get_chapter_knowledge_graph(1, full=True)
+        assert 'scope' not in result['concept_graph']
+        assert result['concept_graph']['concept_count'] == len(get_all_concepts())
+
+    def test_commentary_spectrum_cached(self):
+        """测试注释谱系按章节缓存"""
+        corpus = ClassicService('ddj').get_corpus()
+        spectrum = get_commentary_spectrum(corpus, 1)
+        assert spectrum['chapter'] == 1
+        assert get_commentary_spectrum(corpus, 1) is spectrum
+        assert get_chapter_knowledge_graph(1)['commentary_spectrum'] is spectrum
+
+    def test_api_spectrum_batch(self, client):
+        """测试批量谱系 NDJSON 流"""
+        response = client.get('/api/knowledge/spectrum?chapters=1-3,10')
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        lines = response.data.decode('utf-8').splitlines()
+        assert [json.loads(line)['chapter'] for line in lines] == [1, 2, 3, 10]
+
+        response = client.get('/api/knowledge/spectrum?chapters=80-90')
+        assert response.status_code == 400
+
     def test_get_all_concepts(self):
         """测试获取所有概念列表"""
         concepts = get_all_concepts()
@@ -485,6 +1581,61 @@ class TestKnowledgeGraph:
         assert len(concepts) > 0
 
 
+class TestCommentarySimilarity:
+    """注释相似度（MinHash/LSH）测试"""
+
+    def test_shingles_strip_punctuation(self):
+        """测试 shingle 忽略标点与空白"""
+        assert shingles('道，可道。', 2) == {'道可', '可道'}
+        assert shingles('道', 2) == {'道'}
+        assert shingles('', 2) == set()
+
+    def test_minhash_estimates_jaccard(self):
+        """测试签名估计的相似度接近真实 Jaccard"""
+        a = {f'a{i}' for i in range(300)}
+        b = {f'a{i}' for i in range(150, 450)}
+        estimate = estimate_similarity(minhash_signature(a), minhash_signature(b))
+        assert abs(estimate - 1 / 3) < 0.15
+        assert estimate_similarity(minhash_signature(a), minhash_signature(a)) == 1.0
+        assert minhash_signature(set()) == ()
+
+    def test_index_skips_missing_commentaries(self):
+        """测试未收录的注释不进入索引"""
+        chapters = [
+            {'chapter': 1, 'wangbi_note': '以无为本，崇本息末', 'suzhe_note': '此版本暂未收录'},
+            {'chapter': 2, 'wangbi_note': '以无为本，举本统末', 'original': '以无为本'},
+        ]
+        index = CommentarySimilarityIndex(chapters)
+        assert (1, 'wangbi') in index.signatures
+        assert (1, 'suzhe') not in index.signatures
+        assert index.similar(1, 'suzhe') == []
+        assert [r['chapter'] for r in index.similar(1, 'wangbi')] == [2]
+
+    def test_similarity_index_across_chapters(self):
+        """测试全书注释索引及缓存"""
+        corpus = ClassicService('ddj').get_corpus()
+        index = get_similarity_index(corpus)
+        assert get_similarity_index(corpus) is index
+        assert len(index) > 81
+        results = index.similar(38, 'heshanggong')
+        assert results
+        assert all((r['chapter'], r['commentator']) != (38, 'heshanggong') for r in results)
+        scores = [r['similarity'] for r in results]
+        assert scores == sorted(scores, reverse=True)
+
+    def test_api_similar_commentaries(self, client):
+        """测试相似注释 API"""
+        response = client.get('/api/knowledge/similar/38/heshanggong?limit=3')
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['commentator_name'] == '河上公'
+        assert len(data['similar']) <= 3
+        assert all('commentator_name' in r for r in data['similar'])
+
+        response = client.get('/api/knowledge/similar/38/nobody')
+        assert response.status_code == 404
+
+
 class TestCrossCivilizationDialogue:
     """跨文明哲学对话测试"""
 
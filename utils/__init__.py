@@ -6,6 +6,9 @@
 from utils.validators import (
     validate_chapter_id,
     validate_search_query,
+    validate_pagination,
+    validate_chapter_range,
+    parse_field_list,
     sanitize_text,
 )
 from utils.security import (
@@ -13,12 +16,21 @@ from utils.security import (
     get_security_headers,
     get_client_ip,
 )
+from utils.http_cache import (
+    conditional_get,
+    file_digest,
+)
 
 __all__ = [
     'validate_chapter_id',
     'validate_search_query',
+    'validate_pagination',
+    'validate_chapter_range',
+    'parse_field_list',
     'sanitize_text',
     'rate_limit',
     'get_security_headers',
     'get_client_ip',
+    'conditional_get',
+    'file_digest',
 ]
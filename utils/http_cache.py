@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+HTTP 缓存工具 - 内容版本、ETag 与条件请求
+版本号由数据文件（页面还包括模板）的内容哈希得出，
+客户端携带匹配的 If-None-Match 时在编码或渲染之前直接返回 304
+"""
+
+import hashlib
+import os
+import time
+from functools import wraps
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Tuple, Union
+from flask import current_app, make_response, request
+
+# 模板目录检查间隔（秒）
+CHECK_INTERVAL = 1.0
+
+# 默认 Cache-Control max-age（秒），0 表示每次都向服务器验证
+DEFAULT_MAX_AGE = 0
+
+# 文件内容哈希缓存 {路径: ((修改时间, 大小), 哈希)}
+_file_digests: Dict[str, Tuple[Tuple[int, int], str]] = {}
+
+# 各模板目录的版本
+_template_versions: Dict[str, 'TemplateVersion'] = {}
+
+
+def file_digest(path: Optional[Union[str, Path]]) -> str:
+    """
+    计算文件内容的 SHA-256（按修改时间与大小缓存）
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        十六进制哈希；路径为空或文件不存在时返回空字符串
+    """
+    if path is None:
+        return ''
+    path = str(path)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return ''
+
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = _file_digests.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 16), b''):
+                digest.update(block)
+    except OSError:
+        return ''
+    _file_digests[path] = (signature, digest.hexdigest())
+    return _file_digests[path][1]
+
+
+def combine_digests(parts: Iterable[str]) -> str:
+    """
+    合并多个版本号为一个
+
+    Args:
+        parts: 版本号或其他标识字符串
+
+    Returns:
+        十六进制哈希
+    """
+    return hashlib.sha256('\0'.join(parts).encode('utf-8')).hexdigest()
+
+
+class TemplateVersion:
+    """
+    模板目录的内容版本
+    按检查间隔扫描目录，文件修改时间或大小变化时重新计算内容哈希
+    """
+
+    def __init__(self, folder: Union[str, Path], check_interval: float = CHECK_INTERVAL):
+        """
+        Args:
+            folder: 模板目录
+            check_interval: 目录检查间隔（秒）
+        """
+        self.folder = str(folder)
+        self.check_interval = check_interval
+        self.version = ''
+        self._signature = None
+        self._last_checked: Optional[float] = None
+
+    def _scan(self):
+        """列出目录下所有文件 [(相对路径, 修改时间, 大小)]"""
+        entries = []
+        for root, _dirs, files in os.walk(self.folder):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((os.path.relpath(path, self.folder), stat.st_mtime_ns, stat.st_size))
+        return sorted(entries)
+
+    def get(self) -> str:
+        """
+        获取当前模板版本
+
+        Returns:
+            十六进制哈希
+        """
+        now = time.monotonic()
+        if self._last_checked is not None and now - self._last_checked < self.check_interval:
+            return self.version
+        self._last_checked = now
+
+        signature = self._scan()
+        if signature != self._signature:
+            self.version = combine_digests(
+                f'{relpath}:{file_digest(os.path.join(self.folder, relpath))}'
+                for relpath, _mtime, _size in signature
+            )
+            self._signature = signature
+        return self.version
+
+
+def get_template_version(app=None) -> str:
+    """
+    获取应用模板目录的内容版本
+
+    Args:
+        app: Flask 应用实例，默认为当前应用
+
+    Returns:
+        十六进制哈希
+    """
+    app = app or current_app
+    folder = os.path.join(app.root_path, app.template_folder or 'templates')
+    version = _template_versions.get(folder)
+    if version is None:
+        version = _template_versions.setdefault(folder, TemplateVersion(folder))
+    return version.get()
+
+
+def get_cache_control(max_age: int) -> str:
+    """
+    生成 Cache-Control 头
+
+    Args:
+        max_age: 客户端可直接使用缓存的秒数
+
+    Returns:
+        Cache-Control 头的值
+    """
+    if max_age <= 0:
+        return 'public, no-cache'
+    return f'public, max-age={max_age}'
+
+
+def conditional_get(version_func: Callable[..., str], templates: bool = False,
+                    vary: Iterable[str] = ()):
+    """
+    条件请求装饰器：为响应生成强 ETag，匹配 If-None-Match 时直接返回 304
+
+    Args:
+        version_func: 以视图参数调用，返回响应所依赖数据的版本号
+        templates: 响应是否由模板渲染（模板版本计入 ETag）
+        vary: 响应随之变化的请求头；304 与 200 携带相同的 Vary，中间缓存按同样的键区分版本
+
+    Usage:
+        @bp.route('/<classic_id>/chapter/<int:chapter_id>')
+        @conditional_get(lambda classic_id, **_: get_classic_version(classic_id))
+        def api_chapter(classic_id, chapter_id):
+            ...
+    """
+    vary = tuple(vary)
+
+    def decorator(f: Callable) -> Callable:
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return f(*args, **kwargs)
+
+            # 查询参数（字段投影、分页等）改变响应内容，一并计入
+            parts = [version_func(*args, **kwargs), request.full_path]
+            if templates:
+                parts.append(get_template_version())
+            etag = combine_digests(parts)[:32]
+            cache_control = get_cache_control(
+                current_app.config.get('HTTP_CACHE_MAX_AGE', DEFAULT_MAX_AGE)
+            )
+
+            # 同一内容的压缩版本使用带编码后缀的 ETag，客户端持有其中任一版本均视为未变化
+            matched = next(
+                (candidate for candidate in (etag, f'{etag}-gzip', f'{etag}-br')
+                 if request.if_none_match.contains(candidate)),
+                None
+            )
+            if matched is not None:
+                response = current_app.response_class(status=304)
+                response.set_etag(matched)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                encoding = response.headers.get('Content-Encoding')
+                response.set_etag(f'{etag}-{encoding}' if encoding else etag)
+
+            response.headers['Cache-Control'] = cache_control
+            for header in vary:
+                response.vary.add(header)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+跨进程速率限制存储 - SQLite（WAL 模式）
+同一主机上的多个 worker 进程共享一个计数表，限额按整体而非每个进程计算；
+无需 Redis 等外部服务；数据库文件默认位于应用 instance 目录（见 init_rate_limiter）
+"""
+
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Union
+from utils.security import (
+    MAX_TRACKED_KEYS,
+    RateLimitBackend,
+    RateLimitState,
+    sliding_window_estimate,
+    sliding_window_retry_after,
+)
+
+# 每处理多少次检查清理一次过期计数
+PRUNE_EVERY = 256
+
+# 等待其他进程释放写锁的最长时间（秒）
+BUSY_TIMEOUT = 5.0
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS rate_limits (
+    key TEXT PRIMARY KEY,
+    window REAL NOT NULL,
+    idx INTEGER NOT NULL,
+    current INTEGER NOT NULL,
+    previous INTEGER NOT NULL,
+    expires REAL NOT NULL
+)
+'''
+
+
+class SQLiteRateLimiter(RateLimitBackend):
+    """
+    SQLite 滑动窗口速率限制器
+    计数规则与内存限制器相同；每次检查在一个 IMMEDIATE 事务中读改写，
+    多进程、多线程并发时放行数不超过上限。每个线程（fork 后的每个进程）使用独立连接
+    """
+
+    def __init__(self, path: Union[str, Path], max_keys: int = MAX_TRACKED_KEYS):
+        """
+        Args:
+            path: 数据库文件路径（同一主机上共享限额的进程使用同一路径）
+            max_keys: 最多跟踪的标识符数
+        """
+        self.path = str(path)
+        self.max_keys = max_keys
+        self._local = threading.local()
+        # 检查次数计数器（itertools.count 的 next 在 CPython 中是原子的，无需加锁）
+        self._checks = itertools.count(1)
+        with self._connect() as conn:
+            conn.execute(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """获取本线程的连接（fork 后重新连接，不复用父进程的连接）"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def check(self, key: str, max_requests: int = 10, window: int = 60,
+              now: Optional[float] = None) -> RateLimitState:
+        """
+        检查并记录一次请求
+        读取、判定与写回在同一个 BEGIN IMMEDIATE 事务中完成：事务开始即取得写锁，
+        其他进程或线程的检查会等待（至多 BUSY_TIMEOUT 秒）而不是读到旧计数，
+        因此并发请求的放行数不会超过 max_requests
+
+        Args:
+            key: 请求标识符（如 IP 地址）
+            max_requests: 时间窗口内最大请求数
+            window: 时间窗口（秒）
+            now: 当前时间（默认 time.time()）
+
+        Returns:
+            RateLimitState，放行时已计入本次请求
+        """
+        now = time.time() if now is None else now
+        index = int(now // window)
+        elapsed = now / window - index
+
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT window, idx, current, previous FROM rate_limits WHERE key = ?', (key,)
+            ).fetchone()
+            current = previous = 0
+            if row is not None and row[0] == window:
+                if row[1] == index:
+                    current, previous = row[2], row[3]
+                elif row[1] == index - 1:
+                    previous = row[2]
+
+            estimate = sliding_window_estimate(previous, current, elapsed)
+            allowed = estimate + 1 <= max_requests
+            if allowed:
+                current += 1
+                estimate += 1
+                retry_after = 0.0
+            else:
+                retry_after = sliding_window_retry_after(previous, current, elapsed, max_requests, window)
+
+            conn.execute(
+                'INSERT OR REPLACE INTO rate_limits (key, window, idx, current, previous, expires) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (key, window, index, current, previous, (index + 2) * window)
+            )
+            if next(self._checks) % PRUNE_EVERY == 0:
+                self._prune(conn, now)
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+        return RateLimitState(
+            allowed=allowed,
+            limit=max_requests,
+            remaining=max(0, int(max_requests - estimate)),
+            retry_after=retry_after,
+            reset_after=(1 - elapsed) * window
+        )
+
+    def _prune(self, conn: sqlite3.Connection, now: float):
+        """删除已失效的计数，并将标识符数限制在上限内（调用方持有事务）"""
+        conn.execute('DELETE FROM rate_limits WHERE expires <= ?', (now,))
+        conn.execute(
+            'DELETE FROM rate_limits WHERE key IN ('
+            'SELECT key FROM rate_limits ORDER BY expires DESC LIMIT -1 OFFSET ?)',
+            (self.max_keys,)
+        )
+
+    def __len__(self) -> int:
+        return self._connect().execute('SELECT COUNT(*) FROM rate_limits').fetchone()[0]
+
+    def clear(self, key: str = None):
+        """清理记录"""
+        conn = self._connect()
+        if key:
+            conn.execute('DELETE FROM rate_limits WHERE key = ?', (key,))
+        else:
+            conn.execute('DELETE FROM rate_limits')
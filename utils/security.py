@@ -1,22 +1,127 @@
 # -*- coding: utf-8 -*-
 """
 安全工具 - 速率限制、CORS、安全头
+速率限制的计数存储可替换：默认为进程内存，多 worker 部署可改用同机共享的 SQLite
+（配置 RATE_LIMIT_BACKEND，见 utils/rate_limit_store.py）
 """
 
+import hashlib
+import math
+import os
+import threading
 import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
 from functools import wraps
-from flask import request, jsonify
-from typing import Callable, Dict
+from flask import current_app, request, jsonify, make_response
+from typing import Callable, Dict, NamedTuple, Optional, Union
 
+# 限流器最多跟踪的标识符数（超出时淘汰最久未访问的）
+MAX_TRACKED_KEYS = 10000
 
-class RateLimiter:
+
+class RateLimitState(NamedTuple):
+    """单次限流检查的结果"""
+    allowed: bool
+    limit: int
+    remaining: int
+    # 被拒绝时距离下一次可放行的秒数（放行时为 0）
+    retry_after: float
+    # 距离当前窗口结束的秒数
+    reset_after: float
+
+
+class _WindowCounter:
+    """
+    单个标识符的滑动窗口计数（固定大小）
+    只保存当前与上一个固定窗口的请求数，按时间比例估算滑动窗口内的请求数
     """
-    简单的内存速率限制器
-    注意：生产环境应使用 Redis 等外部存储
+
+    __slots__ = ('window', 'index', 'current', 'previous')
+
+    def __init__(self, window: float, index: int):
+        self.window = window
+        self.index = index
+        self.current = 0
+        self.previous = 0
+
+    def advance(self, index: int):
+        """滚动到第 index 个固定窗口"""
+        if index == self.index:
+            return
+        self.previous = self.current if index == self.index + 1 else 0
+        self.current = 0
+        self.index = index
+
+    @property
+    def expires(self) -> float:
+        """两个窗口计数都失效的时间点"""
+        return (self.index + 2) * self.window
+
+
+def sliding_window_estimate(previous: int, current: int, elapsed: float) -> float:
     """
+    估算滑动窗口内的请求数
 
-    def __init__(self):
-        self._requests: Dict[str, list] = {}
+    Args:
+        previous: 上一个固定窗口的请求数
+        current: 当前固定窗口的请求数
+        elapsed: 当前固定窗口已过去的比例（0~1）
+
+    Returns:
+        估算的请求数
+    """
+    return previous * (1 - elapsed) + current
+
+
+def sliding_window_retry_after(previous: int, current: int, elapsed: float,
+                               max_requests: int, window: float) -> float:
+    """
+    计算估算请求数降到可再放行一次所需的秒数
+
+    Args:
+        previous: 上一个固定窗口的请求数
+        current: 当前固定窗口的请求数
+        elapsed: 当前固定窗口已过去的比例（0~1）
+        max_requests: 时间窗口内最大请求数
+        window: 时间窗口（秒）
+
+    Returns:
+        等待秒数
+    """
+    budget = max_requests - 1
+    if current <= budget:
+        # 在当前窗口内，上一窗口的权重衰减到足够小即可
+        if previous <= 0:
+            return 0.0
+        target = 1 - (budget - current) / previous
+        return max(0.0, (target - elapsed) * window)
+    # 当前窗口已满：等到下一窗口，本窗口计数作为上一窗口衰减
+    target = 1 - budget / current if current else 0.0
+    return (1 - elapsed + target) * window
+
+
+class RateLimitBackend(ABC):
+    """
+    速率限制计数存储接口
+    子类实现 check 与 clear，rate_limit 装饰器通过 get_rate_limiter() 使用当前存储
+    """
+
+    @abstractmethod
+    def check(self, key: str, max_requests: int = 10, window: int = 60,
+              now: Optional[float] = None) -> RateLimitState:
+        """
+        检查并记录一次请求
+
+        Args:
+            key: 请求标识符（如 IP 地址）
+            max_requests: 时间窗口内最大请求数
+            window: 时间窗口（秒）
+            now: 当前时间（默认 time.time()）
+
+        Returns:
+            RateLimitState，放行时已计入本次请求
+        """
 
     def is_allowed(self, key: str, max_requests: int = 10, window: int = 60) -> bool:
         """
@@ -30,83 +135,246 @@ class RateLimiter:
         Returns:
             是否允许请求
         """
-        now = time.time()
+        return self.check(key, max_requests, window).allowed
+
+    @abstractmethod
+    def clear(self, key: str = None):
+        """清理记录"""
+
+
+class RateLimiter(RateLimitBackend):
+    """
+    内存滑动窗口速率限制器（单进程，默认存储）
+    每个标识符只保存两个计数，is_allowed 为 O(1)；
+    按最近访问顺序淘汰计数已失效或超出上限的标识符，内存有界，线程安全
+    """
+
+    def __init__(self, max_keys: int = MAX_TRACKED_KEYS):
+        """
+        Args:
+            max_keys: 最多跟踪的标识符数
+        """
+        self.max_keys = max_keys
+        self._counters: 'OrderedDict[str, _WindowCounter]' = OrderedDict()
+        self._lock = threading.Lock()
 
-        if key not in self._requests:
-            self._requests[key] = []
+    def __len__(self) -> int:
+        return len(self._counters)
 
-        # 清理过期记录
-        self._requests[key] = [
-            timestamp for timestamp in self._requests[key]
-            if now - timestamp < window
-        ]
+    def check(self, key: str, max_requests: int = 10, window: int = 60,
+              now: Optional[float] = None) -> RateLimitState:
+        """
+        检查并记录一次请求
 
-        # 检查是否超过限制
-        if len(self._requests[key]) >= max_requests:
-            return False
+        Args:
+            key: 请求标识符（如 IP 地址）
+            max_requests: 时间窗口内最大请求数
+            window: 时间窗口（秒）
+            now: 当前时间（默认 time.time()）
 
-        # 记录本次请求
-        self._requests[key].append(now)
-        return True
+        Returns:
+            RateLimitState，放行时已计入本次请求
+        """
+        now = time.time() if now is None else now
+        index = int(now // window)
+        elapsed = now / window - index
+
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None or counter.window != window:
+                counter = _WindowCounter(window, index)
+                self._counters[key] = counter
+            else:
+                counter.advance(index)
+            self._counters.move_to_end(key)
+            self._evict(now)
+
+            estimate = sliding_window_estimate(counter.previous, counter.current, elapsed)
+            allowed = estimate + 1 <= max_requests
+            if allowed:
+                counter.current += 1
+                estimate += 1
+                retry_after = 0.0
+            else:
+                retry_after = sliding_window_retry_after(
+                    counter.previous, counter.current, elapsed, max_requests, window
+                )
+
+        return RateLimitState(
+            allowed=allowed,
+            limit=max_requests,
+            remaining=max(0, math.floor(max_requests - estimate)),
+            retry_after=retry_after,
+            reset_after=(1 - elapsed) * window
+        )
+
+    def _evict(self, now: float):
+        """淘汰计数已失效及超出上限的标识符（调用方持有锁）"""
+        counters = self._counters
+        while counters:
+            key, counter = next(iter(counters.items()))
+            if len(counters) <= self.max_keys and counter.expires > now:
+                break
+            del counters[key]
 
     def clear(self, key: str = None):
         """清理记录"""
-        if key:
-            self._requests.pop(key, None)
-        else:
-            self._requests.clear()
+        with self._lock:
+            if key:
+                self._counters.pop(key, None)
+            else:
+                self._counters.clear()
 
 
 # 全局限流器实例
-_rate_limiter = RateLimiter()
+_rate_limiter: RateLimitBackend = RateLimiter()
+
+
+def get_rate_limiter() -> RateLimitBackend:
+    """获取当前使用的速率限制存储"""
+    return _rate_limiter
+
+
+def set_rate_limiter(backend: RateLimitBackend):
+    """
+    替换速率限制存储
+
+    Args:
+        backend: RateLimitBackend 实例
+    """
+    global _rate_limiter
+    _rate_limiter = backend
 
 
-def rate_limit(max_requests: int = 10, window: int = 60):
+def init_rate_limiter(app):
+    """
+    按应用配置选择速率限制存储
+
+    Args:
+        app: Flask 应用实例
+    """
+    backend = app.config.get('RATE_LIMIT_BACKEND', 'memory')
+    if backend == 'sqlite':
+        # 仅在启用时导入 sqlite3
+        from utils.rate_limit_store import SQLiteRateLimiter
+        # 默认放在应用 instance 目录，不使用其他用户可预先创建的公共临时目录
+        path = app.config.get('RATE_LIMIT_DB')
+        if not path:
+            os.makedirs(app.instance_path, exist_ok=True)
+            path = os.path.join(app.instance_path, 'ratelimit.sqlite3')
+        set_rate_limiter(SQLiteRateLimiter(path))
+    elif backend == 'memory':
+        set_rate_limiter(RateLimiter())
+    else:
+        raise ValueError(f'Unknown RATE_LIMIT_BACKEND: {backend}')
+
+
+def get_client_ip(trusted_hops: Optional[int] = None) -> str:
+    """
+    获取客户端真实 IP 地址
+    只信任最近 trusted_hops 层代理追加的 X-Forwarded-For 条目，
+    客户端自行伪造的前置条目不会被采用
+
+    Args:
+        trusted_hops: 可信代理层数，默认取配置 TRUSTED_PROXY_HOPS；0 表示直接使用连接地址
+
+    Returns:
+        IP 地址字符串
+    """
+    if trusted_hops is None:
+        trusted_hops = current_app.config.get('TRUSTED_PROXY_HOPS', 0)
+    if trusted_hops > 0:
+        forwarded = request.headers.get('X-Forwarded-For')
+        if forwarded:
+            hops = [hop.strip() for hop in forwarded.split(',') if hop.strip()]
+            if hops:
+                # 第 N 层可信代理追加的条目即为它看到的客户端地址
+                return hops[-min(trusted_hops, len(hops))]
+        if request.headers.get('X-Real-IP'):
+            return request.headers.get('X-Real-IP')
+    return request.remote_addr or 'unknown'
+
+
+def key_by_ip() -> str:
+    """限流标识：客户端 IP"""
+    return f'ip:{get_client_ip()}'
+
+
+def key_by_api_key() -> str:
+    """限流标识：API Key（X-API-Key 请求头，只保存哈希），未携带时按客户端 IP"""
+    api_key = request.headers.get('X-API-Key')
+    if api_key:
+        return 'key:' + hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:16]
+    return key_by_ip()
+
+
+# 可按名称配置的限流标识（配置 RATE_LIMIT_KEY 或 rate_limit(key=...)）
+RATE_LIMIT_KEYS: Dict[str, Callable[[], str]] = {
+    'ip': key_by_ip,
+    'api_key': key_by_api_key,
+}
+
+
+def get_rate_limit_headers(state: RateLimitState) -> Dict[str, str]:
+    """
+    根据限流状态生成响应头
+
+    Args:
+        state: 本次检查的限流状态
+
+    Returns:
+        X-RateLimit-* 头（被拒绝时另含 Retry-After）
+    """
+    headers = {
+        'X-RateLimit-Limit': str(state.limit),
+        'X-RateLimit-Remaining': str(state.remaining),
+        'X-RateLimit-Reset': str(math.ceil(state.reset_after)),
+    }
+    if not state.allowed:
+        headers['Retry-After'] = str(max(1, math.ceil(state.retry_after)))
+    return headers
+
+
+def rate_limit(max_requests: int = 10, window: int = 60, group: Optional[str] = None,
+               key: Optional[Union[str, Callable[[], str]]] = None):
     """
     速率限制装饰器
+    计数按 (路由组, 标识) 分桶；同一组内的路由共享额度，不同组互不影响
 
     Args:
         max_requests: 时间窗口内最大请求数
         window: 时间窗口（秒）
+        group: 路由组名，默认为视图的 endpoint
+        key: 限流标识，'ip'、'api_key' 或返回标识字符串的函数；默认取配置 RATE_LIMIT_KEY
 
     Usage:
         @app.route('/api/search')
-        @rate_limit(max_requests=20, window=60)
+        @rate_limit(max_requests=20, window=60, group='search')
         def search():
             ...
     """
     def decorator(f: Callable) -> Callable:
         @wraps(f)
         def wrapper(*args, **kwargs):
-            # 使用 IP 地址作为标识符
-            key = request.remote_addr or 'unknown'
-
-            if not _rate_limiter.is_allowed(key, max_requests, window):
-                return jsonify({
+            key_func = key if key is not None else current_app.config.get('RATE_LIMIT_KEY', 'ip')
+            if isinstance(key_func, str):
+                key_func = RATE_LIMIT_KEYS[key_func]
+            bucket = f'{group or request.endpoint}:{key_func()}'
+
+            state = get_rate_limiter().check(bucket, max_requests, window)
+            if state.allowed:
+                response = make_response(f(*args, **kwargs))
+            else:
+                response = make_response(jsonify({
                     'error': 'Too many requests',
-                    'retry_after': window
-                }), 429
-
-            return f(*args, **kwargs)
+                    'retry_after': max(1, math.ceil(state.retry_after))
+                }), 429)
+            response.headers.update(get_rate_limit_headers(state))
+            return response
         return wrapper
     return decorator
 
 
-def get_client_ip() -> str:
-    """
-    获取客户端真实 IP 地址
-
-    Returns:
-        IP 地址字符串
-    """
-    # 检查代理头
-    if request.headers.get('X-Forwarded-For'):
-        return request.headers.get('X-Forwarded-For').split(',')[0].strip()
-    if request.headers.get('X-Real-IP'):
-        return request.headers.get('X-Real-IP')
-    return request.remote_addr or 'unknown'
-
-
 def get_security_headers() -> Dict[str, str]:
     """
     获取推荐的安全响应头
@@ -161,6 +429,8 @@ def init_security(app):
     Args:
         app: Flask 应用实例
     """
+    init_rate_limiter(app)
+
     # 添加安全头到所有响应
     @app.after_request
     def apply_security_headers(response):
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+单飞加载 - 合并对同一键的并发加载
+缓存未命中时第一个调用方执行加载，同时到达的其他调用方等待同一个 Future，
+多线程 WSGI 服务器在缓存清空后只解析一次数据文件
+"""
+
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    按键合并并发调用
+    每个键同一时刻至多执行一次加载函数，加载结束后不保留结果（缓存由调用方负责）
+    """
+
+    def __init__(self):
+        # 进行中的加载 {键: Future}
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """
+        执行或等待对 key 的加载
+
+        Args:
+            key: 加载键（如经典ID）
+            func: 加载函数，仅由第一个调用方执行
+
+        Returns:
+            加载结果；加载函数抛出的异常会传给所有等待的调用方
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def in_flight(self, key: Hashable) -> bool:
+        """
+        是否有对 key 的加载正在进行
+
+        Args:
+            key: 加载键
+
+        Returns:
+            是否进行中
+        """
+        with self._lock:
+            return key in self._calls
@@ -4,7 +4,7 @@
 """
 
 import re
-from typing import Optional
+from typing import List, Optional, Tuple
 
 
 def validate_chapter_id(chapter_id: int) -> bool:
@@ -68,3 +68,74 @@ def sanitize_text(text: str, max_length: int = 1000) -> str:
         text = text[:max_length]
 
     return text.strip()
+
+
+def validate_pagination(page, per_page, max_per_page: int = 50) -> Tuple[int, int]:
+    """
+    规范化分页参数
+
+    Args:
+        page: 页码（可为字符串）
+        per_page: 每页数量（可为字符串）
+        max_per_page: 每页数量上限
+
+    Returns:
+        (page, per_page)，非法值回退为默认值 (1, 20)，超出上限时截断
+    """
+    try:
+        page = int(page)
+    except (TypeError, ValueError):
+        page = 1
+    try:
+        per_page = int(per_page)
+    except (TypeError, ValueError):
+        per_page = 20
+
+    page = max(page, 1)
+    per_page = min(max(per_page, 1), max_per_page)
+    return page, per_page
+
+
+def validate_chapter_range(value: Optional[str], max_chapter: int = 81) -> Tuple[Optional[List[int]], Optional[str]]:
+    """
+    解析章节范围参数，如 "1-81"、"1,3,5-7"
+
+    Args:
+        value: 章节范围字符串，为空时表示全部章节
+        max_chapter: 最大章节编号
+
+    Returns:
+        (chapter_ids, error_message)，chapter_ids 升序且去重
+    """
+    if not value:
+        return list(range(1, max_chapter + 1)), None
+
+    chapter_ids = set()
+    for part in value.split(','):
+        part = part.strip()
+        match = re.fullmatch(r'(\d+)(?:-(\d+))?', part)
+        if not match:
+            return None, "章节范围格式错误"
+        start = int(match.group(1))
+        end = int(match.group(2) or start)
+        if start > end or start < 1 or end > max_chapter:
+            return None, f"章节范围须在 1-{max_chapter} 之间"
+        chapter_ids.update(range(start, end + 1))
+
+    return sorted(chapter_ids), None
+
+
+def parse_field_list(value: Optional[str]) -> Optional[List[str]]:
+    """
+    解析字段列表参数，如 "original,wangbi_note"
+
+    Args:
+        value: 逗号分隔的字段名
+
+    Returns:
+        去重后的字段名列表（保持顺序，忽略非法字段名）；参数为空时返回 None
+    """
+    if not value:
+        return None
+    fields = [f.strip() for f in value.split(',')]
+    return list(dict.fromkeys(f for f in fields if re.fullmatch(r'\w+', f)))